@@ -1,26 +1,40 @@
 import os
+import re
 import json
+import asyncio
 import tempfile
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, status
+from fastapi.responses import JSONResponse
+import orjson
 from pydantic import BaseModel
 
 # Load environment variables
 load_dotenv()
 
 # Import services and utilities
-import uuid
 from app.services.firebase_client import firebase_client
+from app.services.description_cache import description_cache
 from app.services.model_client import gemini_model_client
 from app.services.video_service import VideoProcessingService
-from app.services.video_chat import VideoChat
+from app.services.video_chat import get_video_chat, get_or_create_video_chat
 from app.services.highlights_reel import HighlightsReelGen
 from app.services.autocut_service import AutoCut
 from app.utils.timecode import seconds_to_hhmmss, hhmmss_to_seconds
 from app.utils.sanitize import sanitize_firebase_key
-from app.utils.ffmpeg_tools import get_video_duration, sample_frames, concatenate_videos, render_video_with_cuts
+from app.utils.ffmpeg_tools import get_video_duration_async, concatenate_videos_async, render_video_with_cuts_async
+
+# Matches "CUT ... HH:MM:SS" marker lines in a fullDescription, capturing the first timestamp on the line
+_CUT_MARKER_RE = re.compile(r'^\s*cut\b[^\n]*?(\d{2}:\d{2}:\d{2})', re.I | re.M)
+
+# Opt-in GPU encoding for renders; hardware encoders are faster but don't match libx264's output quality
+RENDER_HW_ACCEL = os.getenv("RENDER_HW_ACCEL", "false").lower() in ("1", "true", "yes")
+
+# Allowed drift per source video between the concatenated duration and the sum of the sources
+CONCAT_DURATION_TOLERANCE = 0.25
 
 # --- Data Models ---
 class VideoProcessRequest(BaseModel):
@@ -102,17 +116,27 @@ class Cut(BaseModel):
     reason: str
 
 # --- FastAPI App Initialization ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Resolve the storage bucket once at startup and share the handle (and its HTTP session) across requests
+    app.state.bucket = firebase_client.get_bucket()
+    yield
+
 app = FastAPI(
     title="AI Video Editor Backend",
     description="FastAPI backend for an AI-driven video editor using Google Gemini.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
-# In-memory session store for VideoChat
-video_chat_sessions: Dict[str, VideoChat] = {}
+class OrjsonResponse(JSONResponse):
+    # For endpoints returning plain dicts (raw DB nodes, chat history); response_model endpoints
+    # are already serialized by pydantic and keep FastAPI's default response class
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
 
 # --- Health and Info Endpoints ---
-@app.get("/", summary="Basic service info")
+@app.get("/", response_class=OrjsonResponse, summary="Basic service info")
 async def read_root():
     return {
         "service_name": "AI Video Editor Backend",
@@ -127,7 +151,7 @@ async def read_root():
         ]
     }
 
-@app.get("/health", summary="Health check")
+@app.get("/health", response_class=OrjsonResponse, summary="Health check")
 async def health_check():
     try:
         # Try to access Firebase to check connection
@@ -140,21 +164,20 @@ async def health_check():
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Health check failed: {e}")
 
 # --- Debug/Testing Endpoints ---
-@app.get("/debug/storage-exists", summary="Check if a blob exists in Firebase Storage")
+@app.get("/debug/storage-exists", response_class=OrjsonResponse, summary="Check if a blob exists in Firebase Storage")
 async def debug_storage_exists(path: str):
     try:
-        bucket = firebase_client.get_bucket()
+        bucket = app.state.bucket
         blob = bucket.blob(path)
         exists = blob.exists()
         return {"path": path, "exists": exists}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error checking storage: {e}")
 
-@app.get("/debug/project/{user_id}/{project_id}", summary="Summary of project data")
+@app.get("/debug/project/{user_id}/{project_id}", response_class=OrjsonResponse, summary="Summary of project data")
 async def debug_project_summary(user_id: str, project_id: str):
     try:
-        project_ref = firebase_client.db_ref().child("projects").child(user_id).child(project_id)
-        project_data = project_ref.get()
+        project_data = firebase_client.get_project_cached(user_id, project_id)
         if not project_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found.")
 
@@ -163,12 +186,13 @@ async def debug_project_summary(user_id: str, project_id: str):
         output_filename = project_data.get("output_filename")
 
         storage_files_presence = {}
-        bucket = firebase_client.get_bucket()
+        bucket = app.state.bucket
         if output_filename:
-            full_mp4_path = f"projects/{user_id}/{project_id}/full.mp4"
-            preview_mp4_path = f"projects/{user_id}/{project_id}/preview.mp4"
-            storage_files_presence["full.mp4"] = bucket.blob(full_mp4_path).exists()
-            storage_files_presence["preview.mp4"] = bucket.blob(preview_mp4_path).exists()
+            # One listing call covers both presence checks
+            project_prefix = f"projects/{user_id}/{project_id}/"
+            project_files = {blob.name[len(project_prefix):] for blob in bucket.list_blobs(prefix=project_prefix, delimiter="/")}
+            storage_files_presence["full.mp4"] = "full.mp4" in project_files
+            storage_files_presence["preview.mp4"] = "preview.mp4" in project_files
 
         return {
             "user_id": user_id,
@@ -186,7 +210,7 @@ async def debug_project_summary(user_id: str, project_id: str):
 
 from starlette.responses import StreamingResponse
 
-@app.get("/debug/video-analysis/{user_id}/{video_filename}", summary="Returns raw DB node for video analysis")
+@app.get("/debug/video-analysis/{user_id}/{video_filename}", response_class=OrjsonResponse, summary="Returns raw DB node for video analysis")
 async def debug_video_analysis(user_id: str, video_filename: str):
     try:
         sanitized_filename = sanitize_firebase_key(video_filename)
@@ -200,10 +224,10 @@ async def debug_video_analysis(user_id: str, video_filename: str):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Error fetching video analysis debug info: {e}")
 
-@app.get("/debug/download-file", summary="[TEMPORARY] Download a file from Firebase Storage locally")
+@app.get("/debug/download-file", response_class=OrjsonResponse, summary="[TEMPORARY] Download a file from Firebase Storage locally")
 async def debug_download_file(path: str):
     try:
-        bucket = firebase_client.get_bucket()
+        bucket = app.state.bucket
         blob = bucket.blob(path)
         if not blob.exists():
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"File not found in storage: {path}")
@@ -242,17 +266,16 @@ async def process_video_endpoint(request: VideoProcessRequest):
 @app.get("/video-result/{user_id}/{video_filename}", response_model=ProcessingResult, summary="Get video processing results")
 async def get_video_result(user_id: str, video_filename: str):
     sanitized_filename = sanitize_firebase_key(video_filename)
-    video_analysis_ref = firebase_client.db_ref().child("video_analysis").child(user_id).child(sanitized_filename)
-    analysis_data = video_analysis_ref.get()
+    analysis_data = firebase_client.get_video_analysis_cached(user_id, sanitized_filename)
 
     if not analysis_data or analysis_data.get("status") != "completed":
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video analysis not found or not completed.")
     
     return ProcessingResult(**analysis_data)
 
-@app.get("/list-videos", summary="Lists available video files for quick inspection")
+@app.get("/list-videos", response_class=OrjsonResponse, summary="Lists available video files for quick inspection")
 async def list_videos(user_id: Optional[str] = None):
-    bucket = firebase_client.get_bucket()
+    bucket = app.state.bucket
     blobs = bucket.list_blobs(prefix=f"videos/{user_id}/" if user_id else "videos/")
     video_files = []
     for blob in blobs:
@@ -282,18 +305,18 @@ async def create_new_project(request: NewProjectRequest):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No video_ids provided for the project.")
 
     project_output_path_in_storage = f"projects/{user_id}/{project_id}/full.mp4"
-    bucket = firebase_client.get_bucket()
+    bucket = app.state.bucket
     project_ref = firebase_client.db_ref().child("projects").child(user_id).child(project_id)
 
-    local_video_paths = []
     full_description_entries = []
     current_offset_seconds = 0.0
 
     with tempfile.TemporaryDirectory() as temp_dir:
-        for video_id in video_ids:
+        loop = asyncio.get_event_loop()
+
+        async def _fetch_one(video_id: str):
             sanitized_video_id = sanitize_firebase_key(video_id)
-            video_analysis_ref = firebase_client.db_ref().child("video_analysis").child(user_id).child(sanitized_video_id)
-            video_analysis_data = video_analysis_ref.get()
+            video_analysis_data = await loop.run_in_executor(None, firebase_client.get_video_analysis_cached, user_id, sanitized_video_id)
 
             if not video_analysis_data or video_analysis_data.get("status") != "completed":
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Video analysis for {video_id} not found or not completed.")
@@ -302,28 +325,38 @@ async def create_new_project(request: NewProjectRequest):
             video_path_in_storage = f"videos/{user_id}/{video_filename}"
             blob = bucket.blob(video_path_in_storage)
 
-            if not blob.exists():
+            if not await loop.run_in_executor(None, blob.exists):
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Source video {video_filename} not found in storage.")
 
-            local_video_path = os.path.join(temp_dir, video_filename)
-            blob.download_to_filename(local_video_path)
-            local_video_paths.append(local_video_path)
+            # ffmpeg/ffprobe read the source straight from storage, so nothing is downloaded up front
+            signed_url = await loop.run_in_executor(None, lambda: blob.generate_signed_url(version="v4", expiration=timedelta(hours=1), method="GET"))
+            return signed_url, video_analysis_data.get("frame_descriptions", {})
+
+        # Fetch analysis nodes and sign source URLs concurrently; gather preserves video_ids order
+        results = await asyncio.gather(*[_fetch_one(video_id) for video_id in video_ids])
+        source_video_urls = [signed_url for signed_url, _ in results]
 
-            # Build fullDescription with offsets
-            frame_descriptions = video_analysis_data.get("frame_descriptions", {})
-            sorted_timestamps = sorted(frame_descriptions.keys(), key=hhmmss_to_seconds)
+        # Probe all source durations at once rather than one ffprobe after another
+        durations = await asyncio.gather(*[get_video_duration_async(signed_url) for signed_url in source_video_urls])
+
+        for (_, frame_descriptions), duration in zip(results, durations):
+            # Build fullDescription with offsets; parse each timestamp once and sort on the numeric value
+            timestamp_pairs = sorted((hhmmss_to_seconds(ts_str), ts_str) for ts_str in frame_descriptions)
             
-            for ts_str in sorted_timestamps:
-                original_seconds = hhmmss_to_seconds(ts_str)
+            for original_seconds, ts_str in timestamp_pairs:
                 offset_seconds = original_seconds + current_offset_seconds
                 offset_ts_str = seconds_to_hhmmss(offset_seconds)
                 full_description_entries.append(f"{offset_ts_str}: {frame_descriptions[ts_str]}")
             
-            current_offset_seconds += get_video_duration(local_video_path)
+            current_offset_seconds += duration
 
         output_filename = f"{project_id}_full.mp4"
         local_output_path = os.path.join(temp_dir, output_filename)
-        concatenate_videos(local_video_paths, local_output_path)
+        await concatenate_videos_async(source_video_urls, local_output_path)
+        # A source stream that drops mid-file can end its entry early while ffmpeg still exits 0
+        concatenated_duration = await get_video_duration_async(local_output_path)
+        if abs(concatenated_duration - current_offset_seconds) > CONCAT_DURATION_TOLERANCE * len(source_video_urls):
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Concatenated video is {concatenated_duration:.2f}s but the source videos total {current_offset_seconds:.2f}s; a source download was likely cut short.")
         print(f"Concatenated videos to {local_output_path}")
 
         # Upload concatenated video to Firebase Storage
@@ -336,9 +369,12 @@ async def create_new_project(request: NewProjectRequest):
             "video_ids": video_ids,
             "fullDescription": "\n".join(full_description_entries),
             "createdAt": datetime.now().isoformat(),
-            "output_filename": project_output_path_in_storage
+            "output_filename": project_output_path_in_storage,
+            "duration_seconds": current_offset_seconds
         }
         project_ref.set(project_data)
+        firebase_client.invalidate_project(user_id, project_id)
+        description_cache.invalidate(user_id, project_id)
         print(f"Project data saved to Firebase for {project_id}")
 
     return NewProjectResponse(
@@ -349,13 +385,23 @@ async def create_new_project(request: NewProjectRequest):
         output_filename=project_output_path_in_storage
     )
 
+def _covers_whole_video(segments: List[Tuple[float, float]], duration: float, tolerance: float = 0.05) -> bool:
+    # True only when the segments, in the order given, run back to back from 0 to duration;
+    # reordered or overlapping segments change the render, so they never count as the whole video
+    covered_until = 0.0
+    for start, end in segments:
+        if abs(start - covered_until) > tolerance or end <= start:
+            return False
+        covered_until = end
+    return abs(covered_until - duration) <= tolerance
+
 @app.post("/rendervideo", response_model=RenderVideoResponse, summary="Render a video with cuts or specified segments")
 async def render_project_video(request: RenderVideoRequest):
     user_id = request.user_id
     project_id = request.project_id
 
     project_ref = firebase_client.db_ref().child("projects").child(user_id).child(project_id)
-    project_data = project_ref.get()
+    project_data = firebase_client.get_project_cached(user_id, project_id)
     if not project_data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {project_id} not found.")
 
@@ -363,12 +409,14 @@ async def render_project_video(request: RenderVideoRequest):
     if not full_mp4_path_in_storage:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Full video for project {project_id} not found in storage metadata.")
 
-    bucket = firebase_client.get_bucket()
-    full_mp4_blob = bucket.blob(full_mp4_path_in_storage)
-    if not full_mp4_blob.exists():
+    bucket = app.state.bucket
+    # get_blob also loads the size, which decides whether the download is split into chunks
+    full_mp4_blob = bucket.get_blob(full_mp4_path_in_storage)
+    if full_mp4_blob is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Full video file {full_mp4_path_in_storage} not found in storage.")
 
     final_segments_to_keep: List[Tuple[float, float]] = []
+    cut_timestamps: List[float] = [] # List of seconds where cuts should be applied
 
     if request.segments_to_keep:
         # Use explicitly provided segments
@@ -376,71 +424,70 @@ async def render_project_video(request: RenderVideoRequest):
         print(f"Rendering with explicit segments: {final_segments_to_keep}")
     else:
         # Fallback to existing logic: compute segments from "CUT" markers
-        full_description_lines = project_data.get("fullDescription", "").split('\n')
-        cut_timestamps = [] # List of seconds where cuts should be applied
-        for line in full_description_lines:
-            if line.strip().lower().startswith("cut"):
-                try:
-                    parts = line.split(":", 3)
-                    if len(parts) >= 3:
-                        ts_str = f"{parts[1].strip()}:{parts[2].strip()}:{parts[3].split(':',1)[0].strip()}"
-                        cut_timestamps.append(hhmmss_to_seconds(ts_str))
-                    else:
-                        print(f"Warning: Could not parse cut timestamp from line: {line}")
-                except ValueError:
-                    print(f"Warning: Could not parse cut timestamp from line: {line}")
-
-        with tempfile.TemporaryDirectory() as temp_dir:
-            local_full_mp4_path_for_duration = os.path.join(temp_dir, "full_duration.mp4")
-            full_mp4_blob.download_to_filename(local_full_mp4_path_for_duration)
-            video_duration = get_video_duration(local_full_mp4_path_for_duration)
-            os.remove(local_full_mp4_path_for_duration) # Clean up temp file
-
-        current_start = 0.0
-        sorted_cut_timestamps = sorted(list(set(cut_timestamps)))
-
-        for cut_time in sorted_cut_timestamps:
-            if cut_time > current_start:
-                final_segments_to_keep.append((current_start, cut_time))
-            current_start = cut_time + 1.0 # Apply 1-second cut
-
-        if current_start < video_duration:
-            final_segments_to_keep.append((current_start, video_duration))
-        print(f"Rendering with segments derived from 'CUT' markers: {final_segments_to_keep}")
-
-    if not final_segments_to_keep:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No segments to keep for rendering.")
+        cut_timestamps = [hhmmss_to_seconds(ts) for ts in _CUT_MARKER_RE.findall(project_data.get("fullDescription", ""))]
+
+    # Duration is cached at project creation; older projects fall back to probing the downloaded file
+    video_duration = project_data.get("duration_seconds")
 
     with tempfile.TemporaryDirectory() as temp_dir:
         local_full_mp4_path = os.path.join(temp_dir, "full.mp4")
-        full_mp4_blob.download_to_filename(local_full_mp4_path)
-        print(f"Downloaded full video to {local_full_mp4_path}")
-        
-        preview_output_filename = f"{project_id}_preview.mp4"
-        local_preview_path = os.path.join(temp_dir, preview_output_filename)
-        preview_path_in_storage = f"projects/{user_id}/{project_id}/preview.mp4"
-
-        audio_path = None
-        if request.audio_file_name:
-            # Download the MP3 file from storage
-            audio_path_in_storage = f"MusicFiles/{user_id}/{project_id}/{request.audio_file_name}"
-            audio_blob = bucket.blob(audio_path_in_storage)
-            if audio_blob.exists():
-                audio_path = os.path.join(temp_dir, request.audio_file_name)
-                audio_blob.download_to_filename(audio_path)
-                print(f"Downloaded audio file to {audio_path}")
-            else:
-                print(f"Warning: Audio file {audio_path_in_storage} not found, using original audio")
-
-        # Update the render_video_with_cuts call:
-        render_video_with_cuts(local_full_mp4_path, local_preview_path, final_segments_to_keep, audio_path)
-        print(f"Rendered preview video to {local_preview_path}")
-
-        preview_blob = bucket.blob(preview_path_in_storage)
-        preview_blob.upload_from_filename(local_preview_path)
-        print(f"Uploaded {local_preview_path} to {preview_path_in_storage}")
+        if video_duration is None:
+            # Off the event loop: the source can be large, and other requests keep being served meanwhile
+            await asyncio.to_thread(firebase_client.download_to_filename, full_mp4_blob, local_full_mp4_path)
+            print(f"Downloaded full video to {local_full_mp4_path}")
+            video_duration = await get_video_duration_async(local_full_mp4_path)
+
+        if not request.segments_to_keep:
+            current_start = 0.0
+            sorted_cut_timestamps = sorted(list(set(cut_timestamps)))
+
+            for cut_time in sorted_cut_timestamps:
+                if cut_time > current_start:
+                    final_segments_to_keep.append((current_start, cut_time))
+                current_start = cut_time + 1.0 # Apply 1-second cut
+
+            if current_start < video_duration:
+                final_segments_to_keep.append((current_start, video_duration))
+            print(f"Rendering with segments derived from 'CUT' markers: {final_segments_to_keep}")
+
+        if not final_segments_to_keep:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No segments to keep for rendering.")
+
+        if not request.audio_file_name and _covers_whole_video(final_segments_to_keep, video_duration):
+            # Nothing would change, so point the preview at full.mp4 instead of re-rendering it
+            preview_path_in_storage = full_mp4_path_in_storage
+            print(f"Segments cover the whole video, using {full_mp4_path_in_storage} as the preview")
+        else:
+            if not os.path.exists(local_full_mp4_path):
+                await asyncio.to_thread(firebase_client.download_to_filename, full_mp4_blob, local_full_mp4_path)
+                print(f"Downloaded full video to {local_full_mp4_path}")
+
+            preview_output_filename = f"{project_id}_preview.mp4"
+            local_preview_path = os.path.join(temp_dir, preview_output_filename)
+            preview_path_in_storage = f"projects/{user_id}/{project_id}/preview.mp4"
+
+            audio_path = None
+            if request.audio_file_name:
+                # Download the MP3 file from storage
+                audio_path_in_storage = f"MusicFiles/{user_id}/{project_id}/{request.audio_file_name}"
+                audio_blob = bucket.blob(audio_path_in_storage)
+                if audio_blob.exists():
+                    audio_path = os.path.join(temp_dir, request.audio_file_name)
+                    audio_blob.download_to_filename(audio_path)
+                    print(f"Downloaded audio file to {audio_path}")
+                else:
+                    print(f"Warning: Audio file {audio_path_in_storage} not found, using original audio")
+
+            # Cuts that all start on keyframes are stream-copied rather than re-encoded
+            await render_video_with_cuts_async(local_full_mp4_path, local_preview_path, final_segments_to_keep, audio_path, hw_accel=RENDER_HW_ACCEL)
+            print(f"Rendered preview video to {local_preview_path}")
+
+            preview_blob = bucket.blob(preview_path_in_storage)
+            preview_blob.upload_from_filename(local_preview_path)
+            print(f"Uploaded {local_preview_path} to {preview_path_in_storage}")
 
         project_ref.update({"preview_filename": preview_path_in_storage})
+        firebase_client.invalidate_project(user_id, project_id)
 
     return RenderVideoResponse(
         project_id=project_id,
@@ -453,21 +500,14 @@ async def render_project_video(request: RenderVideoRequest):
 # --- VideoChat Endpoints ---
 @app.post("/videochat/ask", response_model=VideoChatQuestionResponse, summary="Ask a question about a video project")
 async def ask_video_chat(request: VideoChatQuestionRequest):
-    session_id = request.session_id
-    if not session_id or session_id not in video_chat_sessions:
-        # Create a new session
-        new_session_id = str(uuid.uuid4())
-        video_chat_instance = VideoChat(
-            user_id=request.user_id,
-            project_id=request.project_id,
-            firebase_client=firebase_client,
-            gemini_model_client=gemini_model_client,
-            session_id=new_session_id
-        )
-        video_chat_sessions[new_session_id] = video_chat_instance
-        session_id = new_session_id
-    else:
-        video_chat_instance = video_chat_sessions[session_id]
+    # Resumes the session if it is still live, otherwise creates a new one
+    video_chat_instance = await get_or_create_video_chat(
+        user_id=request.user_id,
+        project_id=request.project_id,
+        firebase_client=firebase_client,
+        gemini_model_client=gemini_model_client,
+        session_id=request.session_id
+    )
 
     try:
         response_data = await video_chat_instance.ask_question(request.question)
@@ -477,26 +517,29 @@ async def ask_video_chat(request: VideoChatQuestionRequest):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"VideoChat question failed: {e}")
 
-@app.get("/videochat/session/{session_id}", summary="Get VideoChat session info")
+@app.get("/videochat/session/{session_id}", response_class=OrjsonResponse, summary="Get VideoChat session info")
 async def get_video_chat_session_info(session_id: str):
-    if session_id not in video_chat_sessions:
+    video_chat_instance = await get_video_chat(session_id)
+    if video_chat_instance is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="VideoChat session not found.")
     
-    return video_chat_sessions[session_id].get_session_info()
+    return video_chat_instance.get_session_info()
 
-@app.get("/videochat/history/{session_id}", summary="Return last N entries in chat history")
+@app.get("/videochat/history/{session_id}", response_class=OrjsonResponse, summary="Return last N entries in chat history")
 async def get_video_chat_history(session_id: str, limit: int = 10):
-    if session_id not in video_chat_sessions:
+    video_chat_instance = await get_video_chat(session_id)
+    if video_chat_instance is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="VideoChat session not found.")
     
-    return video_chat_sessions[session_id].get_chat_history(limit)
+    return video_chat_instance.get_chat_history(limit)
 
-@app.get("/videochat/search/{session_id}", summary="Searches frame descriptions")
+@app.get("/videochat/search/{session_id}", response_class=OrjsonResponse, summary="Searches frame descriptions")
 async def search_video_chat(session_id: str, keyword: str):
-    if session_id not in video_chat_sessions:
+    video_chat_instance = await get_video_chat(session_id)
+    if video_chat_instance is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="VideoChat session not found.")
     
-    return video_chat_sessions[session_id].search_frame_descriptions(keyword)
+    return video_chat_instance.search_frame_descriptions(keyword)
 
 # --- Highlights Reel Endpoints ---
 highlights_reel_gen = HighlightsReelGen(firebase_client, gemini_model_client)
@@ -1,17 +1,48 @@
+import io
 import os
+import asyncio
 import tempfile
 import json
-from typing import List, Dict
-from pydub import AudioSegment
+from pathlib import Path
+from typing import List, Dict, Tuple, Union, BinaryIO
 import librosa
-import librosa.display
-import matplotlib.pyplot as plt
 import numpy as np
+from PIL import Image
 from fastapi import HTTPException, status
 
 from app.services.firebase_client import FirebaseClient
 from app.services.model_client import GeminiModelClient
-from app.utils.ffmpeg_tools import get_video_duration # To get video duration for filtering cuts
+
+# Music files below this size are decoded from memory instead of a temp file
+MAX_IN_MEMORY_AUDIO_BYTES = 200 * 1024 * 1024
+
+def _compute_spectrogram_bytes(source: Union[str, BinaryIO]) -> Tuple[bytes, float]:
+    """CPU-bound: decodes the audio and returns (PNG mel spectrogram bytes, audio duration in seconds)."""
+    # librosa decodes mp3/flac/ogg via soundfile and falls back to audioread (paths only)
+    y, sr = librosa.load(source, sr=22050, mono=True)
+    S_db = librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr), ref=np.max)
+
+    # Encode dB values straight to a grayscale PNG (low frequencies at the bottom), no plotting backend
+    db_range = S_db.max() - S_db.min()
+    img = ((S_db - S_db.min()) * (255.0 / db_range if db_range > 0 else 0.0)).astype(np.uint8)
+    image = Image.fromarray(np.flipud(img)).resize((1000, 400), Image.BILINEAR)
+    # Encoded in memory and sent straight to Gemini, so favour encode speed over PNG size
+    buf = io.BytesIO()
+    image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue(), len(y) / sr
+
+def _valid_cut(cut, video_duration: float):
+    """Returns the normalized {"time", "reason"} cut, or None if it is malformed or outside the video."""
+    if not isinstance(cut, dict):
+        return None
+    cut_time = cut.get("time")
+    reason = cut.get("reason")
+    # bool is an int subclass but never a valid timestamp
+    if not isinstance(cut_time, (int, float)) or isinstance(cut_time, bool) or not isinstance(reason, str):
+        return None
+    if cut_time < 0 or (video_duration and cut_time > video_duration):
+        return None
+    return {"time": float(cut_time), "reason": reason}
 
 class AutoCut:
     def __init__(self, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient):
@@ -21,82 +52,63 @@ class AutoCut:
     async def analyze_song(self, user_id: str, project_id: str, file_name: str) -> List[Dict]:
         music_path_in_storage = f"MusicFiles/{user_id}/{project_id}/{file_name}"
         bucket = self.firebase_client.get_bucket()
-        blob = bucket.blob(music_path_in_storage)
+        # get_blob fetches metadata (incl. size) in the same request as the existence check
+        blob = await asyncio.to_thread(bucket.get_blob, music_path_in_storage)
 
-        if not blob.exists():
+        if blob is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Music file not found in storage: {music_path_in_storage}")
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            local_music_path = os.path.join(temp_dir, file_name)
-            local_wav_path = os.path.join(temp_dir, "audio.wav")
-            
-            blob.download_to_filename(local_music_path)
-            print(f"Downloaded {file_name} to {local_music_path}")
-
-            # Convert to WAV if needed using pydub
-            audio = AudioSegment.from_file(local_music_path)
-            audio.export(local_wav_path, format="wav")
-            print(f"Converted {file_name} to WAV at {local_wav_path}")
-
-            # Generate mel spectrogram
-            y, sr = librosa.load(local_wav_path)
-            
-            # Ensure the spectrogram image is generated without displaying it
-            plt.figure(figsize=(10, 4), dpi=100) # Smaller figure size for faster processing
-            librosa.display.specshow(librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr), ref=np.max),
-                                     sr=sr, x_axis='time', y_axis='mel')
-            plt.colorbar(format='%+2.0f dB')
-            plt.title('Mel-frequency spectrogram')
-            plt.tight_layout()
-            
-            spectrogram_path = os.path.join(temp_dir, "spectrogram.png")
-            plt.savefig(spectrogram_path, bbox_inches='tight', pad_inches=0)
-            plt.close() # Close the plot to free memory
-            print(f"Generated spectrogram at {spectrogram_path}")
-
-            with open(spectrogram_path, "rb") as f:
-                spectrogram_bytes = f.read()
-            
-            music_cuts_raw = self.gemini_model_client.analyze_spectrogram_to_json(spectrogram_bytes)
-            print(f"Gemini returned raw music cuts: {music_cuts_raw}")
-
-            # Fetch fullDescription for video context
-            project_ref = self.firebase_client.db_ref().child("projects").child(user_id).child(project_id)
-            project_data = project_ref.get()
-            if not project_data or "fullDescription" not in project_data:
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {project_id} or its fullDescription not found for AutoCut sync.")
-            full_description = project_data["fullDescription"]
-
-            # Second Gemini call to sync video to music beats
-            synchronized_cuts = self.gemini_model_client.sync_video_to_music_beats(music_cuts_raw, full_description)
-            print(f"Gemini returned synchronized video cuts: {synchronized_cuts}")
-
-            # Get video duration for filtering
-            project_video_path_in_storage = f"projects/{user_id}/{project_id}/full.mp4"
-            project_video_blob = bucket.blob(project_video_path_in_storage)
-            
-            video_duration = 0.0
-            if project_video_blob.exists():
-                with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as temp_video_file:
-                    temp_video_path = temp_video_file.name
-                project_video_blob.download_to_filename(temp_video_path)
-                video_duration = get_video_duration(temp_video_path)
-                os.remove(temp_video_path)
-            else:
-                print(f"Warning: Project video {project_video_path_in_storage} not found, cannot filter synchronized cuts by video duration.")
-
-            filtered_cuts = []
-            for cut in synchronized_cuts:
-                if isinstance(cut, dict) and "time" in cut and "reason" in cut:
+        # The project read doesn't depend on the audio, so overlap it with the download, spectrogram and first Gemini call
+        project_task = asyncio.create_task(asyncio.to_thread(self.firebase_client.get_project_cached, user_id, project_id))
+
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                local_music_path = os.path.join(temp_dir, file_name)
+                spectrogram_bytes = None
+
+                # Decoding and the mel transform are CPU-bound; keep them off the event loop
+                if blob.size is not None and blob.size < MAX_IN_MEMORY_AUDIO_BYTES:
+                    audio_bytes = await asyncio.to_thread(blob.download_as_bytes)
+                    print(f"Downloaded {file_name} into memory ({len(audio_bytes)} bytes)")
                     try:
-                        cut_time = float(cut["time"])
-                        if cut_time >= 0 and (video_duration == 0 or cut_time <= video_duration):
-                            filtered_cuts.append({"time": cut_time, "reason": str(cut["reason"])})
-                        else:
-                            print(f"Filtered out synchronized cut at {cut_time}s (outside video duration {video_duration}s).")
-                    except ValueError:
-                        print(f"Skipping invalid synchronized cut time: {cut['time']}")
+                        spectrogram_bytes, song_duration = await asyncio.to_thread(_compute_spectrogram_bytes, io.BytesIO(audio_bytes))
+                    except Exception as e:
+                        # soundfile can't decode every codec (e.g. AAC) from memory; audioread needs a real file
+                        print(f"In-memory decode of {file_name} failed ({e}), retrying from disk")
+                        await asyncio.to_thread(Path(local_music_path).write_bytes, audio_bytes)
                 else:
-                    print(f"Skipping malformed synchronized cut entry: {cut}")
-            
-            return filtered_cuts
+                    await asyncio.to_thread(self.firebase_client.download_to_filename, blob, local_music_path)
+                    print(f"Downloaded {file_name} to {local_music_path}")
+
+                if spectrogram_bytes is None:
+                    spectrogram_bytes, song_duration = await asyncio.to_thread(_compute_spectrogram_bytes, local_music_path)
+                print(f"Generated spectrogram for {song_duration:.1f}s of audio ({len(spectrogram_bytes)} bytes)")
+
+                music_cuts_raw = await self.gemini_model_client.analyze_spectrogram_to_json_async(spectrogram_bytes, song_duration)
+                print(f"Gemini returned raw music cuts: {music_cuts_raw}")
+
+                # Fetch fullDescription for video context
+                project_data = await project_task
+                if not project_data or "fullDescription" not in project_data:
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {project_id} or its fullDescription not found for AutoCut sync.")
+                full_description = project_data["fullDescription"]
+
+                # Second Gemini call to sync video to music beats
+                synchronized_cuts = await self.gemini_model_client.sync_video_to_music_beats_async(music_cuts_raw, full_description)
+                print(f"Gemini returned synchronized video cuts: {synchronized_cuts}")
+
+                # Video duration for filtering is cached on the project at creation time
+                video_duration = float(project_data.get("duration_seconds", 0.0))
+                if not video_duration:
+                    print(f"Warning: Project {project_id} has no duration_seconds, cannot filter synchronized cuts by video duration.")
+
+                filtered_cuts = [valid for cut in synchronized_cuts if (valid := _valid_cut(cut, video_duration)) is not None]
+                if len(filtered_cuts) != len(synchronized_cuts):
+                    print(f"Dropped {len(synchronized_cuts) - len(filtered_cuts)} malformed or out-of-range synchronized cuts (video duration {video_duration}s).")
+
+                return filtered_cuts
+        except BaseException:
+            # An earlier step failed before the project read was awaited; don't leave it orphaned with an unretrieved error
+            if not project_task.cancel() and not project_task.cancelled():
+                project_task.exception()
+            raise
@@ -0,0 +1,68 @@
+import re
+import asyncio
+import threading
+from typing import Dict, List, NamedTuple, Optional
+from cachetools import TTLCache
+
+from app.services.firebase_client import FirebaseClient, firebase_client
+from app.utils.timecode import hhmmss_to_seconds
+
+# "HH:MM:SS: description", as written by /newProject
+_LINE_RE = re.compile(r'^(\d{2,}:\d{2}:\d{2}): (.*)$')
+
+class ParsedDescription(NamedTuple):
+    # Parallel arrays sorted by time: descs[i] is the description at times[i] seconds
+    times: List[float]
+    descs: List[str]
+    lines: List[str]
+    lines_lower: List[str] # lines[i].lower(), folded once at ingest for keyword search
+    raw: str
+
+def parse_full_description(full_description: str) -> ParsedDescription:
+    """Parses "HH:MM:SS: description" lines into time-sorted parallel lists of seconds and descriptions."""
+    lines = full_description.split('\n')
+    desc_by_sec: Dict[float, str] = {}
+    for line in lines:
+        # One regex match validates and splits the line; anything else is skipped without raising
+        m = _LINE_RE.match(line)
+        if m:
+            desc_by_sec[hhmmss_to_seconds(m.group(1))] = m.group(2)
+    # The dict keeps the last description for a repeated timestamp, as before
+    times = sorted(desc_by_sec)
+    return ParsedDescription(times, [desc_by_sec[t] for t in times], lines, [line.lower() for line in lines], full_description)
+
+class DescriptionCache:
+    """Keeps each project's fullDescription parsed so highlights and VideoChat don't re-split it per request."""
+
+    def __init__(self, firebase_client: FirebaseClient, maxsize: int = 256, ttl: int = 300):
+        self.firebase_client = firebase_client
+        self._lock = threading.Lock()
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Bumped per project on every invalidation, so a fetch that overlapped a write doesn't cache its stale result
+        self._generations: Dict[tuple, int] = {}
+
+    async def get_parsed_description(self, user_id: str, project_id: str) -> Optional[ParsedDescription]:
+        """Returns the parsed fullDescription, or None if the project or its fullDescription is missing."""
+        key = (user_id, project_id)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            generation = self._generations.get(key, 0)
+        # Read only the fullDescription child, not the whole project node and its siblings
+        full_description = await self.firebase_client.get_path(f"projects/{user_id}/{project_id}/fullDescription")
+        if full_description is None:
+            return None
+        parsed = await asyncio.to_thread(parse_full_description, full_description)
+        with self._lock:
+            if self._generations.get(key, 0) == generation:
+                self._cache[key] = parsed
+        return parsed
+
+    def invalidate(self, user_id: str, project_id: str):
+        key = (user_id, project_id)
+        with self._lock:
+            self._cache.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+# Singleton instance
+description_cache = DescriptionCache(firebase_client)
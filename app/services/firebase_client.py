@@ -1,7 +1,18 @@
 import os
 import json
+import asyncio
+import threading
 import firebase_admin
-from firebase_admin import credentials, storage, db
+from cachetools import TTLCache
+from firebase_admin import credentials, db
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import storage
+from google.cloud.storage import transfer_manager
+from requests.adapters import HTTPAdapter
+
+# Blobs at least this large are downloaded as concurrent ranged GETs
+CHUNKED_DOWNLOAD_THRESHOLD = 64 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 32 * 1024 * 1024
 
 class FirebaseClient:
     _instance = None
@@ -28,20 +39,87 @@ class FirebaseClient:
             if not firebase_database_url:
                 raise ValueError("FIREBASE_DATABASE_URL environment variable not set.")
 
-            firebase_admin.initialize_app(cred, {
+            app = firebase_admin.initialize_app(cred, {
                 'storageBucket': firebase_storage_bucket,
                 'databaseURL': firebase_database_url
             })
             print("Firebase initialized successfully.")
+
+            # Resolve the root reference and bucket once; callers reuse these handles
+            self._root_ref = db.reference()
+            # The storage client is handed its session instead of building its own, so its keep-alive pool can be
+            # widened (requests defaults to 10) and concurrent and chunked downloads don't drop connections.
+            # configure_mtls_channel() runs last, as in google-cloud-storage, so an mTLS adapter still takes precedence
+            credential = app.credential.get_credential()
+            self._http = AuthorizedSession(credential)
+            self._http.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=3))
+            self._http.configure_mtls_channel()
+            storage_client = storage.Client(project=app.project_id, credentials=credential, _http=self._http)
+            self._bucket = storage_client.bucket(firebase_storage_bucket)
+
+            # Short-lived read caches for hot RTDB nodes; writers in this process invalidate them
+            self._cache_lock = threading.Lock()
+            self._project_cache = TTLCache(maxsize=1024, ttl=60)
+            self._video_analysis_cache = TTLCache(maxsize=1024, ttl=60)
+            # Bumped per RTDB path on every invalidation, so a read that overlapped a write doesn't cache its stale result
+            self._cache_generations = {}
         except Exception as e:
             print(f"Error initializing Firebase: {e}")
             raise
 
     def get_bucket(self):
-        return storage.bucket()
+        return self._bucket
+
+    def get_http(self):
+        """The pooled, authorized requests session shared by all storage calls."""
+        return self._http
+
+    def download_to_filename(self, blob, local_path: str):
+        """Downloads a blob to disk, splitting large blobs into parallel chunked requests."""
+        if blob.size is not None and blob.size >= CHUNKED_DOWNLOAD_THRESHOLD:
+            # Threads, not processes: the work is network-bound and the client doesn't need pickling
+            transfer_manager.download_chunks_concurrently(
+                blob, local_path, chunk_size=DOWNLOAD_CHUNK_SIZE, worker_type=transfer_manager.THREAD, max_workers=8
+            )
+        else:
+            blob.download_to_filename(local_path)
 
     def db_ref(self):
-        return db.reference()
+        return self._root_ref
+
+    async def get_path(self, path: str):
+        """Reads an RTDB path in a worker thread so several reads can be awaited (and gathered) concurrently."""
+        return await asyncio.to_thread(lambda: self.db_ref().child(path).get())
+
+    def _get_cached(self, cache: TTLCache, key: tuple, path: str):
+        with self._cache_lock:
+            if key in cache:
+                return cache[key]
+            generation = self._cache_generations.get(path, 0)
+        data = self.db_ref().child(path).get()
+        if data is not None:
+            with self._cache_lock:
+                if self._cache_generations.get(path, 0) == generation:
+                    cache[key] = data
+        return data
+
+    def _invalidate(self, cache: TTLCache, key: tuple, path: str):
+        with self._cache_lock:
+            cache.pop(key, None)
+            self._cache_generations[path] = self._cache_generations.get(path, 0) + 1
+
+    def get_project_cached(self, user_id: str, project_id: str):
+        return self._get_cached(self._project_cache, (user_id, project_id), f"projects/{user_id}/{project_id}")
+
+    def invalidate_project(self, user_id: str, project_id: str):
+        self._invalidate(self._project_cache, (user_id, project_id), f"projects/{user_id}/{project_id}")
+
+    def get_video_analysis_cached(self, user_id: str, video_id: str):
+        """`video_id` must already be sanitized with sanitize_firebase_key."""
+        return self._get_cached(self._video_analysis_cache, (user_id, video_id), f"video_analysis/{user_id}/{video_id}")
+
+    def invalidate_video_analysis(self, user_id: str, video_id: str):
+        self._invalidate(self._video_analysis_cache, (user_id, video_id), f"video_analysis/{user_id}/{video_id}")
 
 # Singleton instance
 firebase_client = FirebaseClient()
@@ -1,4 +1,6 @@
 import os
+import bisect
+import asyncio
 import tempfile
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -6,9 +8,12 @@ from fastapi import HTTPException, status
 
 from app.services.firebase_client import FirebaseClient
 from app.services.model_client import GeminiModelClient
-from app.utils.timecode import seconds_to_hhmmss, hhmmss_to_seconds
+from app.services.description_cache import description_cache
+from app.utils.timecode import seconds_to_hhmmss
 from app.utils.ffmpeg_tools import get_video_duration
 
+# Upper bound on in-flight Gemini scene summary requests, to stay within QPS limits
+MAX_CONCURRENT_SCENE_SUMMARIES = 8
 
 class HighlightsReelGen:
     def __init__(self, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient):
@@ -16,17 +21,16 @@ class HighlightsReelGen:
         self.gemini_model_client = gemini_model_client
 
     async def generate_highlights(self, user_id: str, project_id: str, scene_interval: int = 12, user_prompt: Optional[str] = None) -> Dict[str, Any]:
-        project_ref = self.firebase_client.db_ref().child("projects").child(user_id).child(project_id)
-        project_data = project_ref.get()
-        if not project_data or "fullDescription" not in project_data:
+        parsed_description = await description_cache.get_parsed_description(user_id, project_id)
+        if parsed_description is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {project_id} or its fullDescription not found.")
         
-        full_description = project_data["fullDescription"]
+        full_description = parsed_description.raw
         
         if user_prompt:
             # Use Gemini to select and summarize highlights based on user prompt
             try:
-                highlights_raw = self.gemini_model_client.select_and_summarize_highlights(full_description, scene_interval, user_prompt)
+                highlights_raw = await self.gemini_model_client.select_and_summarize_highlights_async(full_description, scene_interval, user_prompt)
                 highlights = []
                 for i, h in enumerate(highlights_raw):
                     highlights.append({
@@ -41,61 +45,65 @@ class HighlightsReelGen:
                 raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Gemini error during prompted highlights generation: {e}")
         else:
             # Fallback to existing logic if no user prompt
-            full_description_lines = full_description.split('\n')
-            frame_descriptions: Dict[float, str] = {} # seconds -> description
-            for line in full_description_lines:
-                if ": " in line:
-                    timestamp_str, desc = line.split(": ", 1)
-                    try:
-                        seconds = hhmmss_to_seconds(timestamp_str)
-                        frame_descriptions[seconds] = desc
-                    except ValueError:
-                        print(f"Warning: Could not parse timestamp from line: {line}")
-            
-            if not frame_descriptions:
+            sorted_timestamps = parsed_description.times
+            frame_descs = parsed_description.descs # frame_descs[i] describes sorted_timestamps[i]
+            if not sorted_timestamps:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No frame descriptions found for the project.")
-
-            sorted_timestamps = sorted(frame_descriptions.keys())
             
             highlights = []
-            scene_id_counter = 0
-            
+
             if not sorted_timestamps:
                 total_scenes = 0
             else:
+                # Build every scene window first, then summarize them all in one batched request
+                scenes = [] # (start, end, caption lines for the summary)
                 video_duration = sorted_timestamps[-1] if sorted_timestamps else 0
                 current_scene_start_time = 0.0
                 while current_scene_start_time < video_duration:
-                    scene_id_counter += 1
                     scene_end_time = min(current_scene_start_time + scene_interval, video_duration)
 
-                    scene_frames_captions = []
-                    for ts in sorted_timestamps:
-                        if current_scene_start_time <= ts < scene_end_time:
-                            scene_frames_captions.append(f"At {seconds_to_hhmmss(ts)}: {frame_descriptions[ts]}")
-                    
-                    scene_summary = "No summary available for this scene."
-                    if scene_frames_captions:
-                        summary_prompt_lines = scene_frames_captions[:3]
-                        summary_prompt = "Create a single concise sentence that summarizes this scene based on these frame descriptions:\n" + "\n".join(summary_prompt_lines)
-                        try:
-                            response = self.gemini_model_client.client.models.generate_content(
-                                model=self.gemini_model_client.model,
-                                contents=[{"role": "user", "parts": [{"text": summary_prompt}]}],
-                            )
-                            scene_summary = getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text
-                        except Exception as e:
-                            print(f"Error summarizing scene {scene_id_counter}: {e}")
+                    # Frames in [start, end) are a contiguous slice of the sorted arrays
+                    lo = bisect.bisect_left(sorted_timestamps, current_scene_start_time)
+                    hi = min(bisect.bisect_left(sorted_timestamps, scene_end_time), lo + 3) # Only the first three frames go into the summary
+                    summary_prompt_lines = [f"At {seconds_to_hhmmss(ts)}: {desc}" for ts, desc in zip(sorted_timestamps[lo:hi], frame_descs[lo:hi])]
+                    scenes.append((current_scene_start_time, scene_end_time, summary_prompt_lines))
+
+                    current_scene_start_time = scene_end_time
+
+                scene_inputs = [{"scene_id": scene_id, "frames": lines} for scene_id, (_, _, lines) in enumerate(scenes, start=1) if lines]
+                summaries_by_id = {}
+                if scene_inputs:
+                    try:
+                        batch = await self.gemini_model_client.summarize_scenes_batch_async(scene_inputs)
+                        summaries_by_id = {item["scene_id"]: item["summary"] for item in batch if isinstance(item, dict) and isinstance(item.get("summary"), str)}
+                    except Exception as e:
+                        print(f"Batched scene summary failed, falling back to per-scene requests: {e}")
+
+                # Any scene the batch missed (or all of them, if it failed) gets its own request
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCENE_SUMMARIES)
 
+                async def summarize_scene(scene_id: int, summary_prompt_lines: List[str]) -> str:
+                    if not summary_prompt_lines:
+                        return "No summary available for this scene."
+                    if scene_id in summaries_by_id:
+                        return summaries_by_id[scene_id]
+                    summary_prompt = "Create a single concise sentence that summarizes this scene based on these frame descriptions:\n" + "\n".join(summary_prompt_lines)
+                    async with semaphore:
+                        return await self.gemini_model_client.summarize_text_async(summary_prompt)
+
+                summaries = await asyncio.gather(*(summarize_scene(scene_id, lines) for scene_id, (_, _, lines) in enumerate(scenes, start=1)), return_exceptions=True)
+
+                for scene_id, ((start, end, _), scene_summary) in enumerate(zip(scenes, summaries), start=1):
+                    if isinstance(scene_summary, Exception):
+                        print(f"Error summarizing scene {scene_id}: {scene_summary}")
+                        scene_summary = "No summary available for this scene."
                     highlights.append({
-                        "scene_id": scene_id_counter,
-                        "start_timestamp": seconds_to_hhmmss(current_scene_start_time),
-                        "end_timestamp": seconds_to_hhmmss(scene_end_time),
+                        "scene_id": scene_id,
+                        "start_timestamp": seconds_to_hhmmss(start),
+                        "end_timestamp": seconds_to_hhmmss(end),
                         "description": scene_summary
                     })
-                    
-                    current_scene_start_time = scene_end_time
-                total_scenes = scene_id_counter
+                total_scenes = len(scenes)
             
         return {
             "user_id": user_id,
@@ -1,169 +1,214 @@
 import os
+import re
 import json
-from typing import List, Dict
+import orjson
+from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from google import genai
+from google.genai import types
+from pydantic import BaseModel
 
 load_dotenv()
 
+def _response_text(response) -> str:
+    return getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text
+
+# Response schemas for Gemini's JSON mode
+class MusicCut(BaseModel):
+    time: float  # seconds
+    reason: str
+
+class Highlight(BaseModel):
+    start_timestamp: str  # HH:MM:SS
+    end_timestamp: str  # HH:MM:SS
+    description: str
+
+class SceneSummary(BaseModel):
+    scene_id: int
+    summary: str
+
+def _json_config(schema) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(response_mime_type="application/json", response_schema=schema)
+
+_JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+
+def _parse_gemini_json(text: str):
+    # JSON mode normally returns a bare document, so the happy path is a single orjson parse
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    # Otherwise take the body of a ```json fence, then fall back to the outermost [...] span
+    m = _JSON_FENCE_RE.search(text)
+    body = m.group(1) if m else text
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        start_idx = body.find('[')
+        end_idx = body.rfind(']')
+        if start_idx == -1 or end_idx <= start_idx:
+            raise
+        return orjson.loads(body[start_idx : end_idx + 1])
+
+def _parse_json_response(response, error_message: str) -> List[Dict]:
+    if not response.text:
+        raise ValueError(error_message)
+    try:
+        return _parse_gemini_json(response.text)
+    except orjson.JSONDecodeError as e:
+        raise ValueError(error_message) from e
+
+def _text_contents(prompt: str) -> List[Dict]:
+    return [{"role": "user", "parts": [{"text": prompt}]}]
+
+def _image_contents(image_bytes: bytes, mime_type: str, prompt: str) -> List[Dict]:
+    return [
+        {"role": "user", "parts": [
+            {"inline_data": {"mime_type": mime_type, "data": image_bytes}},
+            {"text": prompt}
+        ]}
+    ]
+
+def _summarize_captions_prompt(captions: List[str]) -> str:
+    return "Write a concise summary of the video using only these image captions. No meta-commentary. Just the summary:\n- " + "\n- ".join(captions)
+
+def _spectrogram_prompt(duration_seconds: Optional[float]) -> str:
+    prompt = (
+        "Analyze the spectrogram image and return ONLY a valid JSON array with objects of the form "
+        '{ "time": number (seconds), "reason": string }. Do not include any text outside the JSON array.'
+    )
+    if duration_seconds:
+        # The image has no axes, so tell the model how the x-axis maps to time
+        prompt += f" The image spans 0 to {duration_seconds:.2f} seconds from left to right; frequency increases upward."
+    return prompt
+
+def _music_sync_prompt(music_cuts: List[Dict], full_description: str) -> str:
+    music_cut_info = "\n".join([f"- Music Beat at {cut['time']:.2f}s (Reason: {cut['reason']})" for cut in music_cuts])
+    return (
+        "Given the following music beat information and video frame descriptions, "
+        "suggest optimal video segments (start and end times in seconds) that would synchronize well with the music beats. "
+        "Focus on aligning video scene changes or significant events with the music. "
+        "Return ONLY a valid JSON array of objects, where each object has 'time' (float, start of video segment in seconds) "
+        "and 'reason' (string, why this segment was chosen/synced). "
+        "Do not include any text outside the JSON array.\n\n"
+        "Music Beats:\n"
+        f"{music_cut_info}\n\n"
+        "Video Frame Descriptions (HH:MM:SS: description):\n"
+        f"{full_description}\n\n"
+        "Suggested Video Cuts (JSON array):"
+    )
+
+def _scene_batch_prompt(scene_inputs: List[Dict]) -> str:
+    return (
+        "For each scene below, write a single concise sentence that summarizes the scene based on its frame descriptions. "
+        "Return a JSON array with one object per scene: 'scene_id' (integer, copied from the input) and 'summary' (string).\n\n"
+        "Scenes (JSON):\n"
+        f"{json.dumps(scene_inputs)}"
+    )
+
+def _highlights_prompt(full_description: str, scene_interval: int, user_prompt: str) -> str:
+    return (
+        "You are an AI video editor. Based on the following video frame descriptions, "
+        f"identify and summarize key scenes that are relevant to the user's request: '{user_prompt}'. "
+        "Segment the video into scenes approximately every "
+        f"{scene_interval} seconds. For each *relevant* scene, provide a concise summary. "
+        "Return ONLY a valid JSON array of objects, where each object has "
+        "'start_timestamp' (string, HH:MM:SS), 'end_timestamp' (string, HH:MM:SS), "
+        "'description' (string, single concise sentence summarizing the scene). "
+        "Do not include any text outside the JSON array.\n\n"
+        "Video Frame Descriptions (HH:MM:SS: description):\n"
+        f"{full_description}\n\n"
+        "Relevant Highlights (JSON array):"
+    )
+
+# Services await these methods (client.aio) so Gemini round-trips don't block the event loop
 class GeminiModelClient:
     def __init__(self):
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set.")
         self.client = genai.Client(api_key=api_key)
+        self.aio = self.client.aio
         self.model = "gemini-2.5-flash-lite"
 
-    def caption_image(self, image_bytes: bytes, prompt: str) -> str:
-        try:
-            response = self.client.models.generate_content(
-                model = self.model,
-                contents=[
-                    {"role": "user", "parts": [
-                        {"inline_data": {"mime_type": "image/jpeg", "data": image_bytes}},
-                        {"text": prompt}
-                    ]}
-                ]
+    async def _generate_async(self, contents: List[Dict]) -> str:
+        return _response_text(await self.aio.models.generate_content(model=self.model, contents=contents))
 
-            )
-            return getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text
+    async def _generate_json_async(self, contents: List[Dict], schema, error_message: str) -> List[Dict]:
+        response = await self.aio.models.generate_content(model=self.model, contents=contents, config=_json_config(schema))
+        return _parse_json_response(response, error_message)
+
+    async def caption_image_async(self, image_bytes: bytes, prompt: str) -> str:
+        try:
+            return await self._generate_async(_image_contents(image_bytes, "image/jpeg", prompt))
         except Exception as e:
             print(f"Error captioning image with Gemini: {e}")
             raise
 
-    def summarize_from_captions(self, captions: List[str]) -> str:
+    async def summarize_from_captions_async(self, captions: List[str]) -> str:
         try:
-            prompt = "Write a concise summary of the video using only these image captions. No meta-commentary. Just the summary:\n- " + "\n- ".join(captions)
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[{"role": "user", "parts": [{"text": prompt}]}],
-            )
-            return getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text
+            return await self._generate_async(_text_contents(_summarize_captions_prompt(captions)))
         except Exception as e:
             print(f"Error summarizing from captions with Gemini: {e}")
             raise
 
-    def analyze_spectrogram_to_json(self, image_bytes: bytes) -> List[Dict]:
+    async def summarize_text_async(self, prompt: str) -> str:
         try:
-            prompt = (
-                "Analyze the spectrogram image and return ONLY a valid JSON array with objects of the form "
-                '{ "time": number (seconds), "reason": string }. Do not include any text outside the JSON array.'
-            )
-            response = self.client.models.generate_content(
+            return await self._generate_async(_text_contents(prompt))
+        except Exception as e:
+            print(f"Error summarizing text with Gemini: {e}")
+            raise
+
+    async def summarize_scenes_batch_async(self, scene_inputs: List[Dict]) -> List[Dict]:
+        """`scene_inputs` is [{"scene_id": int, "frames": [str, ...]}]; returns [{"scene_id": int, "summary": str}]."""
+        try:
+            contents = _text_contents(_scene_batch_prompt(scene_inputs))
+            return await self._generate_json_async(contents, list[SceneSummary], "Failed to extract valid JSON for scene summaries from Gemini response.")
+        except Exception as e:
+            print(f"Error batch summarizing scenes with Gemini: {e}")
+            raise
+
+    async def create_context_cache_async(self, system_instruction: str, ttl_seconds: int = 3600) -> Optional[str]:
+        """Caches a system instruction server-side; returns the cache name, or None if caching isn't possible (e.g. too few tokens)."""
+        try:
+            cached_content = await self.aio.caches.create(
                 model=self.model,
-                contents=[
-                    {"role": "user", "parts": [
-                        {"inline_data": {"mime_type": "image/png", "data": image_bytes}},
-                        {"text": prompt}
-                    ]}
-                ]
+                config=types.CreateCachedContentConfig(system_instruction=system_instruction, ttl=f"{ttl_seconds}s"),
             )
+            return cached_content.name
+        except Exception as e:
+            print(f"Context caching unavailable, sending the system instruction per request: {e}")
+            return None
 
-            # Attempt to parse JSON, handling potential extra text
-            response_text = getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text
-            text_content = response_text.strip()
-            if text_content.startswith('```json'):
-                text_content = text_content[7:]
-            if text_content.endswith('```'):
-                text_content = text_content[:-3]
-            
-            # Fallback for strict JSON parsing if SDK doesn't support JSON mode directly
-            try:
-                return json.loads(text_content)
-            except json.JSONDecodeError:
-                # Attempt simple bracket extraction retry
-                start_idx = text_content.find('[')
-                end_idx = text_content.rfind(']')
-                if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
-                    json_str = text_content[start_idx : end_idx + 1]
-                    return json.loads(json_str)
-                else:
-                    raise ValueError("Failed to extract valid JSON from Gemini response.")
+    async def chat_async(self, history: List[Dict], question: str, system_instruction: str, cached_content: Optional[str] = None) -> str:
+        """`history` holds prior turns as {"role": "user"/"model", "parts": [{"text": ...}]} dicts."""
+        if cached_content:
+            config = types.GenerateContentConfig(cached_content=cached_content)
+        else:
+            config = types.GenerateContentConfig(system_instruction=system_instruction)
+        contents = history + _text_contents(question)
+        return _response_text(await self.aio.models.generate_content(model=self.model, contents=contents, config=config))
 
+    async def analyze_spectrogram_to_json_async(self, image_bytes: bytes, duration_seconds: Optional[float] = None) -> List[Dict]:
+        try:
+            contents = _image_contents(image_bytes, "image/png", _spectrogram_prompt(duration_seconds))
+            return await self._generate_json_async(contents, list[MusicCut], "Failed to extract valid JSON from Gemini response.")
         except Exception as e:
             print(f"Error analyzing spectrogram with Gemini: {e}")
             raise
 
-    def sync_video_to_music_beats(self, music_cuts: List[Dict], full_description: str) -> List[Dict]:
+    async def sync_video_to_music_beats_async(self, music_cuts: List[Dict], full_description: str) -> List[Dict]:
         try:
-            music_cut_info = "\n".join([f"- Music Beat at {cut['time']:.2f}s (Reason: {cut['reason']})" for cut in music_cuts])
-            
-            prompt = (
-                "Given the following music beat information and video frame descriptions, "
-                "suggest optimal video segments (start and end times in seconds) that would synchronize well with the music beats. "
-                "Focus on aligning video scene changes or significant events with the music. "
-                "Return ONLY a valid JSON array of objects, where each object has 'time' (float, start of video segment in seconds) "
-                "and 'reason' (string, why this segment was chosen/synced). "
-                "Do not include any text outside the JSON array.\n\n"
-                "Music Beats:\n"
-                f"{music_cut_info}\n\n"
-                "Video Frame Descriptions (HH:MM:SS: description):\n"
-                f"{full_description}\n\n"
-                "Suggested Video Cuts (JSON array):"
-            )
-            
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[{"role": "user", "parts": [{"text": prompt}]}]
-            )
-            text_content = (getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text).strip()
-            if text_content.startswith('```json'):
-                text_content = text_content[7:]
-            if text_content.endswith('```'):
-                text_content = text_content[:-3]
-            
-            try:
-                return json.loads(text_content)
-            except json.JSONDecodeError:
-                start_idx = text_content.find('[')
-                end_idx = text_content.rfind(']')
-                if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
-                    json_str = text_content[start_idx : end_idx + 1]
-                    return json.loads(json_str)
-                else:
-                    raise ValueError("Failed to extract valid JSON for music sync from Gemini response.")
-
+            contents = _text_contents(_music_sync_prompt(music_cuts, full_description))
+            return await self._generate_json_async(contents, list[MusicCut], "Failed to extract valid JSON for music sync from Gemini response.")
         except Exception as e:
             print(f"Error syncing video to music beats with Gemini: {e}")
             raise
 
-    def select_and_summarize_highlights(self, full_description: str, scene_interval: int, user_prompt: str) -> List[Dict]:
+    async def select_and_summarize_highlights_async(self, full_description: str, scene_interval: int, user_prompt: str) -> List[Dict]:
         try:
-            prompt = (
-                "You are an AI video editor. Based on the following video frame descriptions, "
-                f"identify and summarize key scenes that are relevant to the user's request: '{user_prompt}'. "
-                "Segment the video into scenes approximately every "
-                f"{scene_interval} seconds. For each *relevant* scene, provide a concise summary. "
-                "Return ONLY a valid JSON array of objects, where each object has "
-                "'start_timestamp' (string, HH:MM:SS), 'end_timestamp' (string, HH:MM:SS), "
-                "'description' (string, single concise sentence summarizing the scene). "
-                "Do not include any text outside the JSON array.\n\n"
-                "Video Frame Descriptions (HH:MM:SS: description):\n"
-                f"{full_description}\n\n"
-                "Relevant Highlights (JSON array):"
-            )
-            
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[{"role": "user", "parts": [{"text": prompt}]}]
-            )
-            text_content = (getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text).strip()
-            if text_content.startswith('```json'):
-                text_content = text_content[7:]
-            if text_content.endswith('```'):
-                text_content = text_content[:-3]
-            
-            try:
-                return json.loads(text_content)
-            except json.JSONDecodeError:
-                start_idx = text_content.find('[')
-                end_idx = text_content.rfind(']')
-                if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
-                    json_str = text_content[start_idx : end_idx + 1]
-                    return json.loads(json_str)
-                else:
-                    raise ValueError("Failed to extract valid JSON for highlights from Gemini response.")
-
+            contents = _text_contents(_highlights_prompt(full_description, scene_interval, user_prompt))
+            return await self._generate_json_async(contents, list[Highlight], "Failed to extract valid JSON for highlights from Gemini response.")
         except Exception as e:
             print(f"Error selecting and summarizing highlights with Gemini: {e}")
             raise
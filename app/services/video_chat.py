@@ -1,17 +1,54 @@
 import os
+import re
 import uuid
-from typing import Dict, List, Any
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Any, Set
 from datetime import datetime
 from memochain.session import MemoChainSession
 from fastapi import HTTPException, status
 from typing import Optional
+from functools import lru_cache
+from cachetools import TTLCache
 
 from app.services.firebase_client import FirebaseClient
 from app.services.model_client import GeminiModelClient
+from app.services.description_cache import description_cache, ParsedDescription
 from app.utils.timecode import seconds_to_hhmmss, hhmmss_to_seconds
 
+_TOKEN_RE = re.compile(r"\w+")
+
+# Prior messages sent with each question, matching the memochain context window
+HISTORY_WINDOW = 8
+# Idle sessions expire after this long; each project's server-side context cache lives as long
+SESSION_TTL = 3600
+
+_SYSTEM_PROMPT_PREFIX = (
+    "You are a video Q&A assistant for answering questions about video content. Answer using the provided video context:\n\n"
+    "Context:\n"
+)
+
+@lru_cache(maxsize=64)
+def _system_prompt_for(full_description: str) -> str:
+    # Sessions share the description string from description_cache, so lookups hit its cached hash
+    # and every session for a project reuses one prompt string instead of building a new copy
+    return _SYSTEM_PROMPT_PREFIX + full_description
+
+# One server-side context cache per project description, shared by all of its sessions. Entries expire
+# a minute before the server-side cache so a session never picks up one that is about to lapse
+_CONTEXT_CACHES: TTLCache = TTLCache(maxsize=256, ttl=SESSION_TTL - 60)
+
+def _context_cache_for(system_prompt: str, gemini_model_client: GeminiModelClient) -> asyncio.Task:
+    # The create runs in the background; there is no await between the lookup and the insert, so concurrent
+    # sessions of a project share one task
+    task = _CONTEXT_CACHES.get(system_prompt)
+    if task is None:
+        task = asyncio.create_task(gemini_model_client.create_context_cache_async(system_prompt, ttl_seconds=SESSION_TTL))
+        _CONTEXT_CACHES[system_prompt] = task
+    return task
+
 class VideoChat:
-    def __init__(self, user_id: str, project_id: str, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient, session_id: Optional[str] = None):
+    def __init__(self, user_id: str, project_id: str, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient, parsed_description: ParsedDescription, session_id: Optional[str] = None):
         self.user_id = user_id
         self.project_id = project_id
         self.firebase_client = firebase_client
@@ -19,46 +56,56 @@ class VideoChat:
         self.session_id = session_id if session_id else str(uuid.uuid4())
         self.chat_history: List[Dict[str, str]] = []
         self.memochain_session = MemoChainSession(session_id=self.session_id, context_window=8)
-        self.full_description: str = self._load_full_description()
+        self.parsed_description = parsed_description
+        self.full_description: str = self.parsed_description.raw
         self.system_prompt = self._build_system_prompt()
+        # Parallel original/lowercased lines, folded once per project by description_cache
+        self._lines = self.parsed_description.lines
+        self._lines_lower = self.parsed_description.lines_lower
+        self._token_index: Optional[Dict[str, Set[int]]] = None
+        # Gemini-format turns sent as conversation history
+        self._history: List[Dict[str, Any]] = []
 
-    def _load_full_description(self) -> str:
-        project_ref = self.firebase_client.db_ref().child("projects").child(self.user_id).child(self.project_id)
-        project_data = project_ref.get()
-        if not project_data or "fullDescription" not in project_data:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {self.project_id} or its fullDescription not found.")
-        return project_data["fullDescription"]
+    @classmethod
+    async def create(cls, user_id: str, project_id: str, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient, session_id: Optional[str] = None) -> "VideoChat":
+        """Loads the project's description without blocking the event loop, then builds the session."""
+        parsed_description = await description_cache.get_parsed_description(user_id, project_id)
+        if parsed_description is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Project {project_id} or its fullDescription not found.")
+        return cls(user_id, project_id, firebase_client, gemini_model_client, parsed_description, session_id=session_id)
 
     def _build_system_prompt(self) -> str:
-        # Assuming fullDescription is already sorted by timestamp
-        context_lines = self.full_description.split('\n')
-        
-        prompt = (
-            "You are a video Q&A assistant for answering questions about video content. Answer using the provided video context:\n\n"
-            "Context:\n" + "\n".join(context_lines)
-        )
-        return prompt
+        # Assuming fullDescription is already sorted by timestamp; it is used verbatim as the context
+        return _system_prompt_for(self.full_description)
 
     async def ask_question(self, question: str) -> Dict[str, str]:
         self.memochain_session.add_user_message(question)
         
-        full_prompt = f"{self.system_prompt}\n\nUser: {question}\nAssistant:"
-        
-        try:
-            # response = self.gemini_model_client.client.generate_content(contents=[full_prompt])
-            response = self.gemini_model_client.client.models.generate_content(
-                model=self.gemini_model_client.model,
-                contents=[{"role": "user", "parts": [{"text": full_prompt}]}],
-            )
-
+        # The description goes in as a system instruction instead of inside every user turn. Once the project's
+        # server-side cache is ready it is referenced by name; until then the question doesn't wait for it
+        cache_task = _context_cache_for(self.system_prompt, self.gemini_model_client)
+        cached_content = cache_task.result() if cache_task.done() and not cache_task.cancelled() else None
 
-            # assistant_response = response.text
-            assistant_response = getattr(response, "output_text", None) or response.candidates[0].content.parts[0].text
+        history = self._history[-HISTORY_WINDOW:]
+        try:
+            try:
+                assistant_response = await self.gemini_model_client.chat_async(history, question, self.system_prompt, cached_content)
+            except Exception as e:
+                if not cached_content:
+                    raise
+                # The cache may have expired; drop it so the next question recreates it, and carry on without it
+                print(f"Cached context failed ({e}), retrying without it")
+                if _CONTEXT_CACHES.get(self.system_prompt) is cache_task:
+                    del _CONTEXT_CACHES[self.system_prompt]
+                assistant_response = await self.gemini_model_client.chat_async(history, question, self.system_prompt)
 
         except Exception as e:
             print(f"Error asking question to Gemini: {e}")
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Gemini error: {e}")
 
+        self._history.append({"role": "user", "parts": [{"text": question}]})
+        self._history.append({"role": "model", "parts": [{"text": assistant_response}]})
+
         self.memochain_session.add_assistant_message(assistant_response)
         
         timestamp = datetime.now().isoformat()
@@ -82,10 +129,56 @@ class VideoChat:
     def get_chat_history(self, limit: int = 10) -> List[Dict[str, str]]:
         return self.chat_history[-limit:]
 
+    def _get_token_index(self) -> Dict[str, Set[int]]:
+        # Built on first use: token -> indexes of the lines containing it
+        if self._token_index is None:
+            token_index = defaultdict(set)
+            for i, lower_line in enumerate(self._lines_lower):
+                for token in _TOKEN_RE.findall(lower_line):
+                    token_index[token].add(i)
+            self._token_index = token_index
+        return self._token_index
+
     def search_frame_descriptions(self, keyword: str) -> List[Dict[str, str]]:
-        found_descriptions = []
         # Assuming full_description is a string where each line is "HH:MM:SS: description"
-        for line in self.full_description.split('\n'):
-            if keyword.lower() in line.lower():
-                found_descriptions.append({"content": line})
-        return found_descriptions
+        k = keyword.lower()
+        if _TOKEN_RE.fullmatch(k):
+            # A single-word keyword can only match inside one token, so scan the vocabulary instead of every line
+            line_indexes = set()
+            for token, indexes in self._get_token_index().items():
+                if k in token:
+                    line_indexes |= indexes
+            return [{"content": self._lines[i]} for i in sorted(line_indexes)]
+        return [{"content": self._lines[i]} for i, lower_line in enumerate(self._lines_lower) if k in lower_line]
+
+# Live sessions by session_id; lookups refresh the TTL so idle sessions expire an hour after last use
+_SESSIONS: TTLCache = TTLCache(maxsize=10_000, ttl=SESSION_TTL)
+_SESSIONS_LOCK = asyncio.Lock()
+
+async def get_video_chat(session_id: Optional[str]) -> Optional[VideoChat]:
+    """Returns the live session for `session_id`, or None if it is unknown or expired."""
+    if not session_id:
+        return None
+    async with _SESSIONS_LOCK:
+        video_chat = _SESSIONS.get(session_id)
+        if video_chat is not None:
+            # Re-insert to restart the TTL, so expiry counts from the last use rather than creation
+            _SESSIONS[session_id] = video_chat
+        return video_chat
+
+async def get_or_create_video_chat(user_id: str, project_id: str, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient, session_id: Optional[str] = None) -> VideoChat:
+    """Resumes `session_id` if it is live, otherwise starts a session under a new id."""
+    video_chat = await get_video_chat(session_id)
+    if video_chat is not None:
+        return video_chat
+    # Built outside the lock so a slow description read doesn't hold up other sessions; the id is new, so nothing can race for it
+    video_chat = await VideoChat.create(
+        user_id=user_id,
+        project_id=project_id,
+        firebase_client=firebase_client,
+        gemini_model_client=gemini_model_client,
+        session_id=str(uuid.uuid4())
+    )
+    async with _SESSIONS_LOCK:
+        _SESSIONS[video_chat.session_id] = video_chat
+    return video_chat
@@ -1,5 +1,7 @@
 import os
+import asyncio
 import tempfile
+from itertools import islice
 from typing import List, Dict
 from datetime import datetime
 from fastapi import HTTPException, status
@@ -8,7 +10,12 @@ from app.services.firebase_client import FirebaseClient
 from app.services.model_client import GeminiModelClient
 from app.utils.timecode import seconds_to_hhmmss
 from app.utils.sanitize import sanitize_firebase_key
-from app.utils.ffmpeg_tools import sample_frames
+from app.utils.ffmpeg_tools import iter_frames_bytes_async
+
+# Upper bound on in-flight Gemini caption requests per video
+MAX_CONCURRENT_CAPTIONS = 16
+# Frame descriptions per RTDB update() call
+FRAME_WRITE_CHUNK_SIZE = 500
 
 class VideoProcessingService:
     def __init__(self, firebase_client: FirebaseClient, gemini_model_client: GeminiModelClient):
@@ -18,38 +25,53 @@ class VideoProcessingService:
     async def process_video(self, user_id: str, video_filename: str) -> dict:
         video_path_in_storage = f"videos/{user_id}/{video_filename}"
         bucket = self.firebase_client.get_bucket()
-        blob = bucket.blob(video_path_in_storage)
+        blob = await asyncio.to_thread(bucket.get_blob, video_path_in_storage)
 
-        if not blob.exists():
+        if blob is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Video not found in storage: {video_path_in_storage}")
 
         with tempfile.TemporaryDirectory() as temp_dir:
             local_video_path = os.path.join(temp_dir, video_filename)
-            blob.download_to_filename(local_video_path)
+            await asyncio.to_thread(self.firebase_client.download_to_filename, blob, local_video_path)
             print(f"Downloaded {video_filename} to {local_video_path}")
 
-            frames_output_dir = os.path.join(temp_dir, "frames")
-            sampled_frames = sample_frames(local_video_path, frames_output_dir, interval=6)
-            print(f"Sampled {len(sampled_frames)} frames.")
-
             frame_descriptions = {}
             captions_list = []
             caption_prompt = "Provide a very brief, precise caption of the main content in this image (max 2 sentences). Focus on key objects, actions, and context."
 
-            for frame_path, timestamp in sampled_frames:
-                try:
-                    with open(frame_path, "rb") as f:
-                        image_bytes = f.read()
-                    caption = self.gemini_model_client.caption_image(image_bytes, caption_prompt)
-                    hhmmss_timestamp = seconds_to_hhmmss(timestamp)
-                    frame_descriptions[hhmmss_timestamp] = caption
-                    captions_list.append(caption)
-                    print(f"Caption for {hhmmss_timestamp}: {caption}")
-                except Exception as e:
-                    print(f"Skipping frame {frame_path} due to error: {e}")
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_CAPTIONS)
+
+            async def caption_frame(image_bytes: bytes) -> str:
+                async with semaphore:
+                    return await self.gemini_model_client.caption_image_async(image_bytes, caption_prompt)
+
+            # Frames are decoded in-process by PyAV; captioning starts on each frame while later ones are still decoding
+            caption_tasks = []
+            timestamps = []
+            try:
+                async for image_bytes, timestamp in iter_frames_bytes_async(local_video_path, interval=6):
+                    caption_tasks.append(asyncio.create_task(caption_frame(image_bytes)))
+                    timestamps.append(timestamp)
+            except BaseException:
+                for task in caption_tasks:
+                    task.cancel()
+                raise
+            print(f"Sampled {len(timestamps)} frames.")
+
+            captions = await asyncio.gather(*caption_tasks, return_exceptions=True)
+
+            # gather preserves input order, so captions stay in timestamp order
+            for timestamp, caption in zip(timestamps, captions):
+                if isinstance(caption, Exception):
+                    print(f"Skipping frame at {timestamp}s due to error: {caption}")
                     # Continue processing other frames even if one fails
+                    continue
+                hhmmss_timestamp = seconds_to_hhmmss(timestamp)
+                frame_descriptions[hhmmss_timestamp] = caption
+                captions_list.append(caption)
+                print(f"Caption for {hhmmss_timestamp}: {caption}")
 
-            summary = self.gemini_model_client.summarize_from_captions(captions_list)
+            summary = await self.gemini_model_client.summarize_from_captions_async(captions_list)
             print(f"Video summary: {summary}")
 
             sanitized_filename = sanitize_firebase_key(video_filename)
@@ -63,6 +85,16 @@ class VideoProcessingService:
                 "status": "completed",
                 "processed_at": datetime.now().isoformat()
             }
-            video_analysis_ref.set(result_data)
+            # Write metadata first (set() also clears frames from any earlier run), then the frames in
+            # parallel chunks, and only then flip status so readers never see a partial "completed" node
+            metadata = {key: value for key, value in result_data.items() if key != "frame_descriptions"}
+            await asyncio.to_thread(video_analysis_ref.set, {**metadata, "status": "processing"})
+            frame_items = iter(frame_descriptions.items())
+            chunks = []
+            while chunk := {f"frame_descriptions/{ts}": caption for ts, caption in islice(frame_items, FRAME_WRITE_CHUNK_SIZE)}:
+                chunks.append(chunk)
+            await asyncio.gather(*(asyncio.to_thread(video_analysis_ref.update, chunk) for chunk in chunks))
+            await asyncio.to_thread(video_analysis_ref.update, {"status": result_data["status"]})
+            self.firebase_client.invalidate_video_analysis(user_id, sanitized_filename)
             print(f"Video analysis results saved to Firebase for {video_filename}")
             return result_data
@@ -1,18 +1,189 @@
+import av
+import io
 import ffmpeg
 import os
+import json
+import struct
+import bisect
+import asyncio
+import tempfile
 import subprocess
-from typing import List, Tuple
+import contextlib
+from functools import lru_cache
+from typing import List, Tuple, Optional, Iterator, AsyncIterator
+
+# libx264 defaults for renders; a preview render doesn't need the slower `medium` preset
+DEFAULT_PRESET = "veryfast"
+DEFAULT_CRF = 20
+
+# Upper bound on segment ffmpeg processes (copies or encodes) running at once during a render
+MAX_PARALLEL_SEGMENTS = os.cpu_count() or 1
+
+# A cut may be stream-copied when it starts within this many seconds of a keyframe
+KEYFRAME_TOLERANCE = 0.2
+KEYFRAME_SEEK_EPSILON = 0.001
+
+def _run_cmd(cmd: List[str], input: Optional[bytes] = None) -> bytes:
+    proc = subprocess.run(cmd, input=input, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        raise ffmpeg.Error(cmd[0], proc.stdout, proc.stderr)
+    return proc.stdout
+
+async def _run_cmd_async(cmd: List[str], input: Optional[bytes] = None) -> bytes:
+    """Runs a command as an asyncio subprocess so the event loop stays responsive."""
+    stdin = asyncio.subprocess.PIPE if input is not None else None
+    proc = await asyncio.create_subprocess_exec(*cmd, stdin=stdin, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    stdout, stderr = await proc.communicate(input)
+    if proc.returncode != 0:
+        raise ffmpeg.Error(cmd[0], stdout, stderr)
+    return stdout
+
+def _duration_from_probe(probe: dict) -> float:
+    # Prefer the video stream's duration, falling back to the container's
+    video_stream = next((stream for stream in probe.get('streams', []) if stream.get('codec_type') == 'video'), None)
+    if video_stream and 'duration' in video_stream:
+        return float(video_stream['duration'])
+    elif 'format' in probe and 'duration' in probe['format']:
+        return float(probe['format']['duration'])
+    return 0.0
+
+def _file_key(input_path: str) -> Optional[Tuple[str, int, int]]:
+    """(absolute path, mtime_ns, size) of a local file, or None for URLs and missing files."""
+    try:
+        st = os.stat(input_path)
+    except (OSError, ValueError):
+        return None
+    return os.path.abspath(input_path), st.st_mtime_ns, st.st_size
+
+def _iter_boxes(f, start: int, end: int):
+    """Yields (type, payload_start, payload_end) for each ISO-BMFF box in [start, end)."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack('>I4s', f.read(8))
+        payload_start = offset + 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            payload_start += 8
+        elif size == 0:
+            size = end - offset
+        if size < payload_start - offset:
+            return
+        yield box_type, payload_start, offset + size
+        offset += size
+
+def _read_box_timing(f, payload_start: int) -> Tuple[int, Optional[int]]:
+    # mvhd and mdhd share this layout: version/flags, creation and modification times, timescale, duration
+    f.seek(payload_start)
+    version = f.read(4)[0]
+    if version == 1:
+        timescale, duration = struct.unpack('>16xIQ', f.read(28))
+        unknown = (1 << 64) - 1
+    else:
+        timescale, duration = struct.unpack('>8xII', f.read(16))
+        unknown = (1 << 32) - 1
+    return timescale, (None if duration == unknown else duration)
+
+def _read_edit_list(f, edts_start: int, edts_end: int) -> List[Tuple[int, int]]:
+    """Returns the elst entries as (segment_duration in movie ticks, media_time in media ticks; -1 = empty edit)."""
+    for box_type, start, _ in _iter_boxes(f, edts_start, edts_end):
+        if box_type != b'elst':
+            continue
+        f.seek(start)
+        version = f.read(4)[0]
+        entry_count = struct.unpack('>I', f.read(4))[0]
+        entry_format, entry_size = ('>Qq4x', 20) if version == 1 else ('>Ii4x', 12)
+        return [struct.unpack(entry_format, f.read(entry_size)) for _ in range(entry_count)]
+    return []
+
+def _duration_from_header(path: str) -> Optional[float]:
+    """
+    Reads the video track duration straight from the MP4/MOV `moov` box, seeking over media data.
+    Matches ffprobe's stream duration for normally muxed files; stream-copied trims can read a few frames
+    long. Returns None for other containers, fragmented files and multi-entry edit lists.
+    """
+    with open(path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        for box_type, start, end in _iter_boxes(f, 0, file_size):
+            if box_type != b'moov':
+                continue
+            movie_timescale = None
+            for child_type, child_start, child_end in _iter_boxes(f, start, end):
+                if child_type == b'mvhd':
+                    movie_timescale, _ = _read_box_timing(f, child_start)
+                if child_type != b'trak':
+                    continue
+                handler_type = media_timescale = media_duration = edits = None
+                for trak_type, trak_start, trak_end in _iter_boxes(f, child_start, child_end):
+                    if trak_type == b'edts':
+                        edits = _read_edit_list(f, trak_start, trak_end)
+                    elif trak_type == b'mdia':
+                        for mdia_type, mdia_start, _ in _iter_boxes(f, trak_start, trak_end):
+                            if mdia_type == b'hdlr':
+                                f.seek(mdia_start + 8)
+                                handler_type = f.read(4)
+                            elif mdia_type == b'mdhd':
+                                media_timescale, media_duration = _read_box_timing(f, mdia_start)
+                if handler_type != b'vide':
+                    continue
+                if not edits:
+                    return media_duration / media_timescale if media_timescale and media_duration else None
+                # A single edit (e.g. the encoder delay shift ffmpeg writes for B-frames) presents exactly its segment
+                if len(edits) == 1 and edits[0][1] >= 0 and edits[0][0] and movie_timescale:
+                    return edits[0][0] / movie_timescale
+                return None
+            return None
+    return None
+
+def _duration_from_container(path: str) -> float:
+    # Same preference as _duration_from_probe: the video stream's duration, else the container's
+    with av.open(path) as container:
+        video_stream = next(iter(container.streams.video), None)
+        if video_stream is not None and video_stream.duration is not None:
+            return float(video_stream.duration * video_stream.time_base)
+        if container.duration is not None:
+            return container.duration / av.time_base
+    return 0.0
+
+@lru_cache(maxsize=256)
+def _duration_cached(path: str, mtime_ns: int, size: int) -> float:
+    # mtime_ns and size only key the cache, so a rewritten file is probed again
+    try:
+        duration = _duration_from_header(path)
+    except Exception as e:
+        print(f"Could not read the container header of {path}, falling back to libav: {e}")
+        duration = None
+    if duration is not None:
+        return duration
+    return _duration_from_container(path)
 
 def get_video_duration(input_path: str) -> float:
-    """Gets the duration of a video in seconds."""
+    """
+    Gets the duration of a video in seconds. Local files are probed in-process (MP4/MOV straight from the
+    container header, anything else through PyAV) once per (path, mtime, size); URLs go through ffprobe.
+    """
+    try:
+        file_key = _file_key(input_path)
+        if file_key:
+            return _duration_cached(*file_key)
+        return _duration_from_probe(ffmpeg.probe(input_path))
+    except ffmpeg.Error as e:
+        print(f"FFmpeg error getting duration for {input_path}: {e.stderr.decode()}")
+        raise
+    except Exception as e:
+        print(f"Error getting video duration for {input_path}: {e}")
+        raise
+
+async def get_video_duration_async(input_path: str) -> float:
+    """Async variant of get_video_duration; lets several probes (e.g. of signed URLs) proceed concurrently."""
     try:
-        probe = ffmpeg.probe(input_path)
-        video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-        if video_stream and 'duration' in video_stream:
-            return float(video_stream['duration'])
-        elif 'format' in probe and 'duration' in probe['format']:
-            return float(probe['format']['duration'])
-        return 0.0
+        file_key = _file_key(input_path)
+        if file_key:
+            # Shares get_video_duration's cache; a miss reads the file in a worker thread
+            return await asyncio.to_thread(_duration_cached, *file_key)
+        cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration:stream=codec_type,duration', '-of', 'json', input_path]
+        stdout = await _run_cmd_async(cmd)
+        return _duration_from_probe(json.loads(stdout.decode('utf-8')))
     except ffmpeg.Error as e:
         print(f"FFmpeg error getting duration for {input_path}: {e.stderr.decode()}")
         raise
@@ -20,55 +191,154 @@ def get_video_duration(input_path: str) -> float:
         print(f"Error getting video duration for {input_path}: {e}")
         raise
 
-def sample_frames(input_path: str, output_dir: str, interval: int = 6) -> List[Tuple[str, float]]:
+def _read_keyframe_times(input_path: str) -> List[float]:
+    # Packet flags come from the demuxer, so no frames need to be decoded
+    times = []
+    with av.open(input_path) as container:
+        video_stream = container.streams.video[0]
+        for packet in container.demux(video_stream):
+            if packet.is_keyframe and packet.pts is not None:
+                times.append(float(packet.pts * video_stream.time_base))
+    return sorted(times)
+
+def get_keyframe_times(input_path: str) -> Optional[List[float]]:
+    """Returns the sorted presentation times (seconds) of the video keyframes, or None if probing fails."""
+    try:
+        return _read_keyframe_times(input_path)
+    except Exception as e:
+        print(f"Could not read keyframes of {input_path}, cuts will be re-encoded: {e}")
+        return None
+
+async def get_keyframe_times_async(input_path: str) -> Optional[List[float]]:
+    """Async variant of get_keyframe_times; demuxing runs in a worker thread."""
+    return await asyncio.to_thread(get_keyframe_times, input_path)
+
+def _snap_to_keyframes(cuts: List[Tuple[float, float]], keyframe_times: List[float], tolerance: float = KEYFRAME_TOLERANCE) -> List[Optional[Tuple[float, float]]]:
+    """
+    Moves each cut start onto the nearest keyframe within `tolerance`; cuts with no keyframe that close map to None.
+    Only starts matter: a copied segment may end on any packet, but must begin on a keyframe to decode.
+    """
+    snapped = []
+    for start, end in cuts:
+        i = bisect.bisect_left(keyframe_times, start)
+        nearby = keyframe_times[max(i - 1, 0):i + 1]
+        nearest = min(nearby, key=lambda keyframe_time: abs(keyframe_time - start)) if nearby else None
+        if nearest is None or abs(nearest - start) > tolerance or nearest >= end:
+            snapped.append(None)
+        else:
+            # Aim just past the keyframe so timestamp rounding can't make the seek land on the one before it
+            snapped.append((nearest + KEYFRAME_SEEK_EPSILON, end))
+    return snapped
+
+def _midpoint_timestamps(duration: float, interval: int) -> List[float]:
+    # Sample at midpoints: for segment [0..3) sample at 1.5s, then 4.5s, etc.
+    timestamps = []
+    current_time = interval / 2.0
+    while current_time < duration:
+        timestamps.append(current_time)
+        current_time += interval
+    return timestamps
+
+def _frame_to_jpeg(frame: av.VideoFrame, height: int = 360) -> bytes:
+    # Like the ffmpeg CLI: apply the display rotation, then scale to `height` keeping the aspect ratio
+    rotation = getattr(frame, 'rotation', 0) or 0
+    quarter_turn = rotation % 180 != 0
+    display_width, display_height = (frame.height, frame.width) if quarter_turn else (frame.width, frame.height)
+    width = max(2, round(display_width * height / display_height))
+    # Scale and convert to RGB in one swscale pass, before the (now cheap) rotation
+    image = frame.reformat(width=height if quarter_turn else width, height=width if quarter_turn else height, format='rgb24').to_image()
+    if rotation:
+        image = image.rotate(rotation, expand=True)
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=85)
+    return buf.getvalue()
+
+def iter_frames_bytes(input_path: str, interval: int = 6) -> Iterator[Tuple[bytes, float]]:
     """
-    Samples frames from a video at a given interval.
-    Returns a list of (frame_path, seconds) tuples.
+    Yields a (jpeg_bytes, seconds) tuple for the midpoint of each `interval`-second window.
+    Decoding happens in-process with PyAV: each sample seeks to the preceding keyframe and decodes
+    only up to the midpoint, instead of decoding the whole video.
     """
-    os.makedirs(output_dir, exist_ok=True)
-    frames_data = []
-    duration = get_video_duration(input_path)
+    timestamps = _midpoint_timestamps(get_video_duration(input_path), interval)
+    if not timestamps:
+        return
 
     try:
-        # Sample at midpoints: for segment [0..3) sample at 1.5s, then 4.5s, etc.
-        current_time = interval / 2.0
-        while current_time < duration:
-            frame_filename = f"frame_{int(current_time * 1000)}.jpg"
-            frame_path = os.path.join(output_dir, frame_filename)
-            
-            (
-                ffmpeg
-                .input(input_path, ss=current_time)
-                .output(frame_path, vframes=1, vf='scale=-1:360') # Scale to height 360 for speed
-                .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-            )
-            frames_data.append((frame_path, current_time))
-            current_time += interval
-    except ffmpeg.Error as e:
-        print(f"FFmpeg error sampling frames from {input_path}: {e.stderr.decode()}")
-        raise
+        with av.open(input_path) as container:
+            video_stream = container.streams.video[0]
+            video_stream.thread_type = 'AUTO'
+            # Sample times are relative to the start of the stream; pts and frame.time are not
+            start_pts = video_stream.start_time or 0
+            start = float(start_pts * video_stream.time_base)
+            for timestamp in timestamps:
+                container.seek(int(timestamp / video_stream.time_base) + start_pts, stream=video_stream)
+                for frame in container.decode(video_stream):
+                    if frame.time is not None and frame.time - start < timestamp:
+                        continue
+                    yield _frame_to_jpeg(frame), timestamp
+                    break
     except Exception as e:
         print(f"Error sampling frames from {input_path}: {e}")
         raise
-    return frames_data
 
-def concatenate_videos(input_paths: List[str], output_path: str):
-    """Concatenates multiple video files into a single output file."""
+async def iter_frames_bytes_async(input_path: str, interval: int = 6) -> AsyncIterator[Tuple[bytes, float]]:
+    """Async variant of iter_frames_bytes; each frame is decoded in a worker thread, so consumers can start on early frames."""
+    frames = iter_frames_bytes(input_path, interval)
     try:
-        # Create a file list for ffmpeg concat demuxer
-        list_file_path = "file_list.txt"
-        with open(list_file_path, "w") as f:
-            for path in input_paths:
-                f.write(f"file '{path}'\n")
-
-        # Use ffmpeg concat demuxer
-        (
-            ffmpeg
-            .input(list_file_path, f='concat', safe=0)
-            .output(output_path, c='copy') # Copy streams without re-encoding for speed
-            .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-        )
-        os.remove(list_file_path)
+        while (item := await asyncio.to_thread(next, frames, None)) is not None:
+            yield item
+    finally:
+        # After a cancellation the worker thread may still be inside next(); the generator is then closed on collection
+        with contextlib.suppress(ValueError):
+            frames.close()
+
+def _run_ffmpeg(stream, input: Optional[bytes] = None):
+    return _run_cmd(stream.compile(overwrite_output=True), input)
+
+async def _run_ffmpeg_async(stream, input: Optional[bytes] = None):
+    return await _run_cmd_async(stream.compile(overwrite_output=True), input)
+
+# Final outputs put the moov atom ahead of mdat so players and CDNs can start before the download ends;
+# intermediate segments skip it since they are only read back by ffmpeg
+OUTPUT_MOVFLAGS = '+faststart'
+
+# Lets the concat demuxer read its list from stdin and open remote (e.g. signed storage URL) entries as well as local files
+CONCAT_PROTOCOL_WHITELIST = "file,pipe,http,https,tcp,tls,crypto"
+# Per-entry options for remote entries: resume a dropped download with a Range request instead of ending that file early
+CONCAT_HTTP_OPTIONS = (("reconnect", "1"), ("reconnect_on_network_error", "1"), ("reconnect_delay_max", "10"))
+
+def _concat_list(input_paths: List[str]) -> str:
+    """Concat demuxer list contents; local entries become absolute `file:` URLs, since a piped list would resolve them against `pipe:`."""
+    lines = []
+    for path in input_paths:
+        if '://' not in path:
+            path = f"file:{os.path.abspath(path)}"
+        escaped_path = path.replace("'", "'\\''")
+        lines.append(f"file '{escaped_path}'\n")
+        if path.startswith(('http://', 'https://')):
+            lines.extend(f"option {key} {value}\n" for key, value in CONCAT_HTTP_OPTIONS)
+    return ''.join(lines)
+
+def _write_concat_list(input_paths: List[str], list_file_path: str) -> str:
+    with open(list_file_path, "w") as f:
+        f.write(_concat_list(input_paths))
+    return list_file_path
+
+def _concat_stream(list_file_path: str, output_path: str):
+    # Use ffmpeg concat demuxer; `pipe:` reads the list from stdin
+    return (
+        ffmpeg
+        .input(list_file_path, f='concat', safe=0, protocol_whitelist=CONCAT_PROTOCOL_WHITELIST)
+        .output(output_path, c='copy', movflags=OUTPUT_MOVFLAGS) # Copy streams without re-encoding for speed
+    )
+
+async def concatenate_videos_async(input_paths: List[str], output_path: str):
+    """
+    Concatenates multiple video files into a single output file.
+    `input_paths` may be local paths or http(s) URLs; remote inputs are streamed, not downloaded first.
+    """
+    try:
+        await _run_ffmpeg_async(_concat_stream('pipe:', output_path), _concat_list(input_paths).encode('utf-8'))
     except ffmpeg.Error as e:
         print(f"FFmpeg error concatenating videos: {e.stderr.decode()}")
         raise
@@ -76,85 +346,177 @@ def concatenate_videos(input_paths: List[str], output_path: str):
         print(f"Error concatenating videos: {e}")
         raise
 
-def render_video_with_cuts(input_path: str, output_path: str, cuts: List[Tuple[float, float]], audio_path: str = None):
+def concatenate_videos(input_paths: List[str], output_path: str):
+    """Blocking wrapper around concatenate_videos_async for scripts."""
+    return asyncio.run(concatenate_videos_async(input_paths, output_path))
+
+# Hardware H.264 encoders in order of preference
+HW_H264_ENCODERS = ('h264_nvenc', 'h264_qsv', 'h264_videotoolbox')
+# Added to the CRF for NVENC's CQ and QSV's global_quality. Both use the same 0-51 QP-style scale as x264's CRF, but the
+# hardware rate control spends more bits at the same number, so a few steps higher lands near libx264's file size.
+# This is an approximation, not a calibrated mapping: hardware output still differs in quality from libx264's
+HW_QUALITY_OFFSET = 3
+
+@lru_cache(maxsize=1)
+def _hw_h264_encoder() -> Optional[str]:
+    """The first hardware H.264 encoder that this ffmpeg build lists and can actually open, or None."""
+    try:
+        listing = _run_cmd(['ffmpeg', '-hide_banner', '-encoders']).decode('utf-8')
+    except Exception as e:
+        print(f"Could not list ffmpeg encoders, using libx264: {e}")
+        return None
+    listed = {fields[1] for fields in (line.split() for line in listing.splitlines()) if len(fields) > 1}
+    for encoder in HW_H264_ENCODERS:
+        if encoder not in listed:
+            continue
+        # Builds list encoders whose GPU or driver may be missing, so encode one test frame first
+        _, output_kwargs = _encode_settings(encoder, DEFAULT_PRESET, DEFAULT_CRF, None)
+        test_stream = ffmpeg.input('color=size=256x256:rate=1', f='lavfi').output('-', f='null', vframes=1, **output_kwargs)
+        try:
+            _run_ffmpeg(test_stream)
+        except ffmpeg.Error:
+            continue
+        print(f"Using hardware encoder {encoder} for renders.")
+        return encoder
+    return None
+
+def _encode_settings(encoder: Optional[str], preset: str, crf: int, tune: Optional[str]) -> Tuple[dict, dict]:
+    """(input kwargs, output kwargs) for an H.264 encode with `encoder`, or libx264 when it is None."""
+    if encoder == 'h264_nvenc':
+        # Decode on the GPU too so frames stay in VRAM; x264 preset/tune names don't apply to NVENC
+        input_kwargs = {'hwaccel': 'cuda', 'hwaccel_output_format': 'cuda'}
+        return input_kwargs, {'vcodec': encoder, 'preset': 'p4', 'tune': 'hq', 'rc': 'vbr', 'cq': crf + HW_QUALITY_OFFSET}
+    if encoder == 'h264_qsv':
+        return {}, {'vcodec': encoder, 'pix_fmt': 'nv12', 'preset': preset, 'global_quality': crf + HW_QUALITY_OFFSET}
+    if encoder == 'h264_videotoolbox':
+        # Constant quality runs 1-100 (higher is better); roughly the same spot as the CRF
+        return {}, {'vcodec': encoder, 'pix_fmt': 'yuv420p', 'q:v': max(1, min(100, 100 - 2 * crf))}
+    output_kwargs = {'vcodec': 'libx264', 'pix_fmt': 'yuv420p', 'preset': preset, 'crf': crf}
+    if tune:
+        output_kwargs['tune'] = tune
+    return {}, output_kwargs
+
+def _render_stream(input_path: str, output_path: str, audio_path: Optional[str], encode_settings: Tuple[dict, dict]):
+    """Builds the ffmpeg-python output graph for a render without cuts."""
+    # If no cuts, just copy the original video
+    print("No cuts specified, copying original video.")
+
+    if audio_path:
+        # Replace audio even when no cuts
+        input_kwargs, output_kwargs = encode_settings
+        return ffmpeg.output(
+            ffmpeg.input(input_path, **input_kwargs)['v:0'],
+            ffmpeg.input(audio_path)['a:0'],
+            output_path, 
+            acodec='aac', 
+            strict='experimental', 
+            shortest=None,  # Use shortest stream duration
+            movflags=OUTPUT_MOVFLAGS,
+            **output_kwargs
+        )
+    return ffmpeg.input(input_path).output(output_path, c='copy', movflags=OUTPUT_MOVFLAGS)
+
+def _render_plan(input_path: str, output_path: str, cuts: List[Tuple[float, float]], audio_path: Optional[str], work_dir: str, keyframe_times: Optional[List[float]], frame_exact: bool, encode_settings: Tuple[dict, dict]) -> List[List[List[str]]]:
     """
-    Renders a video by applying cuts.
-    `cuts` is a list of (start_time, end_time) tuples for segments to KEEP.
-    `audio_path` is an optional path to an audio file to replace the original audio.
+    Returns the render as stages of ffmpeg commands to run in order; commands within a stage are independent.
+    Each cut becomes its own segment file, joined with the concat demuxer. Segments are stream-copied when the
+    original audio is kept and every cut starts within KEYFRAME_TOLERANCE of a keyframe (the start then moves onto
+    it) or `frame_exact` is off; otherwise each one is encoded by a separate ffmpeg process so the encodes can run
+    in parallel.
     """
     if not cuts:
-        # If no cuts, just copy the original video
-        print("No cuts specified, copying original video.")
-        
-        if audio_path:
-            # Replace audio even when no cuts
-            (
-                ffmpeg
-                .output(
-                    ffmpeg.input(input_path)['v'],
-                    ffmpeg.input(audio_path)['a'],
-                    output_path, 
-                    vcodec='libx264', 
-                    acodec='aac', 
-                    strict='experimental', 
-                    pix_fmt='yuv420p',
-                    shortest=None  # Use shortest stream duration
-                )
-                .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-            )
-        else:
-            (
-                ffmpeg
-                .input(input_path)
-                .output(output_path, c='copy')
-                .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-            )
-        return
+        return [[_render_stream(input_path, output_path, audio_path, encode_settings).compile(overwrite_output=True)]]
 
-    try:
-        # Create video segments (video only, no audio)
-        video_segments = []
-        for i, (start, end) in enumerate(cuts):
-            segment_input = ffmpeg.input(input_path, ss=start, to=end)
-            video_segments.append(segment_input.video)
-
-        # Concatenate video segments
-        concatenated_video = ffmpeg.concat(*video_segments, v=1, a=0)  # a=0 means no audio output
-        
-        if audio_path:
-            # Use the provided audio file
-            audio_input = ffmpeg.input(audio_path)
-            (
-                ffmpeg
-                .output(
-                    concatenated_video, 
-                    audio_input['a'], 
-                    output_path, 
-                    vcodec='libx264', 
-                    acodec='aac', 
-                    strict='experimental', 
-                    pix_fmt='yuv420p',
-                    shortest=None  # Use shortest stream duration
-                )
-                .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-            )
+    segment_paths = [os.path.join(work_dir, f"segment_{i:04d}.mp4") for i in range(len(cuts))]
+    copy_cuts = None
+    if not audio_path and not frame_exact:
+        copy_cuts = cuts
+    elif not audio_path and keyframe_times is not None:
+        snapped_cuts = _snap_to_keyframes(cuts, keyframe_times)
+        misaligned = sum(snapped is None for snapped in snapped_cuts)
+        if not misaligned:
+            copy_cuts = snapped_cuts
         else:
-            # Original behavior - concatenate audio from video segments
-            audio_segments = []
-            for i, (start, end) in enumerate(cuts):
-                segment_input = ffmpeg.input(input_path, ss=start, to=end)
-                audio_segments.append(segment_input.audio)
-            
-            concatenated_audio = ffmpeg.concat(*audio_segments, v=0, a=1)
-            (
-                ffmpeg
-                .output(concatenated_video, concatenated_audio, output_path, vcodec='libx264', acodec='aac', strict='experimental', pix_fmt='yuv420p')
-                .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-            )
+            # Copied and re-encoded H.264 segments carry different parameter sets, which the concat demuxer
+            # can't join with -c copy (MP4 keeps only one avcC), so one misaligned cut means encoding them all
+            print(f"{misaligned} of {len(cuts)} cuts don't start near a keyframe, re-encoding all segments.")
+    if copy_cuts is not None:
+        print("Stream-copying segments." if not frame_exact else "All cuts start near keyframes, stream-copying segments.")
+        cuts, input_kwargs, segment_kwargs = copy_cuts, {}, {'c': 'copy', 'avoid_negative_ts': 'make_zero'}
+    elif audio_path:
+        # The replacement audio is muxed in after the concat, so segments are video only
+        input_kwargs, output_kwargs = encode_settings
+        segment_kwargs = {**output_kwargs, 'an': None}
+    else:
+        input_kwargs, output_kwargs = encode_settings
+        segment_kwargs = {**output_kwargs, 'acodec': 'aac'}
+    # -ss/-t as input options: the demuxer seeks to the keyframe at or before the start instead of decoding from 0
+    extract_cmds = []
+    for (start, end), segment_path in zip(cuts, segment_paths):
+        source = ffmpeg.input(input_path, ss=start, t=end - start, **input_kwargs)
+        # Map only the first video (and audio, if any) stream so subtitle/data/extra audio tracks are never touched
+        streams = [source['v:0']] if audio_path else [source['v:0'], source['a:0?']]
+        extract_cmds.append(ffmpeg.output(*streams, segment_path, **segment_kwargs).compile(overwrite_output=True))
+
+    list_file_path = _write_concat_list(segment_paths, os.path.join(work_dir, "segments.txt"))
+    if audio_path:
+        concat_stream = ffmpeg.output(
+            ffmpeg.input(list_file_path, f='concat', safe=0, protocol_whitelist=CONCAT_PROTOCOL_WHITELIST)['v:0'],
+            ffmpeg.input(audio_path)['a:0'],
+            output_path,
+            vcodec='copy',
+            acodec='aac',
+            shortest=None,  # Use shortest stream duration
+            movflags=OUTPUT_MOVFLAGS
+        )
+    else:
+        concat_stream = _concat_stream(list_file_path, output_path)
+    return [extract_cmds, [concat_stream.compile(overwrite_output=True)]]
+
+async def _run_stage_async(stage: List[List[str]]):
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_SEGMENTS)
 
+    async def run(cmd: List[str]) -> bytes:
+        async with semaphore:
+            return await _run_cmd_async(cmd)
+
+    await asyncio.gather(*(run(cmd) for cmd in stage))
+
+async def _render_async(input_path: str, output_path: str, cuts: List[Tuple[float, float]], audio_path: Optional[str], keyframe_times: Optional[List[float]], frame_exact: bool, encode_settings: Tuple[dict, dict]):
+    with tempfile.TemporaryDirectory() as work_dir:
+        for stage in _render_plan(input_path, output_path, cuts, audio_path, work_dir, keyframe_times, frame_exact, encode_settings):
+            await _run_stage_async(stage)
+
+async def render_video_with_cuts_async(input_path: str, output_path: str, cuts: List[Tuple[float, float]], audio_path: str = None, frame_exact: bool = True,
+                                       preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF, tune: Optional[str] = None, hw_accel: bool = False):
+    """
+    Renders a video by applying cuts.
+    `cuts` is a list of (start_time, end_time) tuples for segments to KEEP.
+    `audio_path` is an optional path to an audio file to replace the original audio.
+    With `frame_exact=False` segments are always stream-copied, so a cut may start at the keyframe before its start time.
+    Re-encodes use libx264 with `preset`, `crf` and `tune`. With `hw_accel` they use a working NVENC/QSV/VideoToolbox
+    encoder instead, which is faster but only approximates the CRF (see HW_QUALITY_OFFSET); a failed hardware render
+    is retried with libx264.
+    """
+    try:
+        keyframe_times = await get_keyframe_times_async(input_path) if cuts and not audio_path and frame_exact else None
+        # The first call probes the encoders with blocking subprocess runs; later calls hit the cache
+        encoder = await asyncio.to_thread(_hw_h264_encoder) if hw_accel else None
+        try:
+            await _render_async(input_path, output_path, cuts, audio_path, keyframe_times, frame_exact, _encode_settings(encoder, preset, crf, tune))
+        except ffmpeg.Error as e:
+            if encoder is None:
+                raise
+            print(f"Render with {encoder} failed, retrying with libx264: {e.stderr.decode()}")
+            await _render_async(input_path, output_path, cuts, audio_path, keyframe_times, frame_exact, _encode_settings(None, preset, crf, tune))
     except ffmpeg.Error as e:
         print(f"FFmpeg error rendering video with cuts: {e.stderr.decode()}")
         raise
     except Exception as e:
         print(f"Error rendering video with cuts: {e}")
         raise
+
+def render_video_with_cuts(input_path: str, output_path: str, cuts: List[Tuple[float, float]], audio_path: str = None, frame_exact: bool = True,
+                           preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF, tune: Optional[str] = None, hw_accel: bool = False):
+    """Blocking wrapper around render_video_with_cuts_async for scripts."""
+    return asyncio.run(render_video_with_cuts_async(input_path, output_path, cuts, audio_path, frame_exact, preset, crf, tune, hw_accel))
@@ -1,10 +1,15 @@
+from functools import lru_cache
+
+# Both conversions are pure and called repeatedly on the same timestamps while parsing
+# descriptions and formatting scenes; 2**17 entries covers every second of a 36-hour video
+@lru_cache(maxsize=131072)
 def seconds_to_hhmmss(seconds: float) -> str:
     """Converts a float of seconds to HH:MM:SS format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02}:{minutes:02}:{secs:02}"
 
+@lru_cache(maxsize=131072)
 def hhmmss_to_seconds(ts: str) -> float:
     """Converts HH:MM:SS string to a float of seconds."""
     parts = list(map(int, ts.split(':')))
@@ -1,11 +1,27 @@
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
+import shutil
 from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 
 # Assuming the FastAPI app is running locally at this URL
 BASE_URL = "http://127.0.0.1:8000"
+# Rendered videos can be GBs; copy them in 1 MiB reads
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# One keep-alive session for every call, so each request after the first skips the TCP handshake
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# For AutoCut, we'll define each segment to start at cut.time and last for a fixed duration (e.g., 3 seconds)
+# This is a minimal implementation; more advanced logic would be needed for true music-video sync.
+CUT_SEGMENT_DURATION = 3.0
+# Batch jobs in flight at once; each keeps the backend busy analyzing or rendering
+MAX_CONCURRENT_JOBS = os.cpu_count() or 4
 
 def analyze_song_cli(user_id: str, project_id: str, file_name: str, render_output: Optional[str] = None):
     print(f"Analyzing song '{file_name}' for User: {user_id}, Project: {project_id}")
@@ -17,19 +33,16 @@ def analyze_song_cli(user_id: str, project_id: str, file_name: str, render_outpu
     }
 
     try:
-        response = requests.post(f"{BASE_URL}/autocut/analyze-song", json=payload)
+        response = SESSION.post(f"{BASE_URL}/autocut/analyze-song", json=payload)
         response.raise_for_status() # Raise an exception for HTTP errors
         cuts = response.json()
         
         if cuts:
             print("\n--- AutoCut Analysis Results ---")
             segments_to_keep = []
-            # For AutoCut, we'll define each segment to start at cut.time and last for a fixed duration (e.g., 3 seconds)
-            # This is a minimal implementation; more advanced logic would be needed for true music-video sync.
-            segment_duration = 3.0 
             for i, cut in enumerate(cuts):
                 print(f"Cut {i+1}: Time={cut['time']:.2f}s, Reason='{cut['reason']}'")
-                segments_to_keep.append((cut['time'], cut['time'] + segment_duration))
+                segments_to_keep.append((cut['time'], cut['time'] + CUT_SEGMENT_DURATION))
             print("--------------------------------")
 
             if render_output:
@@ -40,7 +53,7 @@ def analyze_song_cli(user_id: str, project_id: str, file_name: str, render_outpu
                     "segments_to_keep": segments_to_keep,
                     "audio_file_name": file_name  # Add this line
                 }
-                render_response = requests.post(f"{BASE_URL}/rendervideo", json=render_payload)
+                render_response = SESSION.post(f"{BASE_URL}/rendervideo", json=render_payload)
                 render_response.raise_for_status()
                 render_data = render_response.json()
                 
@@ -50,12 +63,13 @@ def analyze_song_cli(user_id: str, project_id: str, file_name: str, render_outpu
                     # Download the rendered video locally using the debug endpoint
                     download_url = f"{BASE_URL}/debug/download-file?path={rendered_video_path_in_storage}"
                     print(f"Attempting to download from: {download_url}")
-                    download_response = requests.get(download_url, stream=True)
+                    # identity encoding: the raw socket bytes are the file, so they can be copied as-is
+                    download_response = SESSION.get(download_url, stream=True, headers={"Accept-Encoding": "identity"})
                     download_response.raise_for_status()
 
                     with open(render_output, 'wb') as f:
-                        for chunk in download_response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                        download_response.raw.decode_content = True
+                        shutil.copyfileobj(download_response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
                     print(f"Downloaded rendered video to {render_output}")
                 else:
                     print("Failed to get rendered video path from backend.")
@@ -73,14 +87,29 @@ def analyze_song_cli(user_id: str, project_id: str, file_name: str, render_outpu
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+def run_batch(batch_path: str, concurrency: int = MAX_CONCURRENT_JOBS):
+    """Runs every job in a JSONL file ({"user_id", "project_id", "file_name", "render_output"?} per line); each job runs the single-run flow above, `concurrency` at a time."""
+    with open(batch_path) as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    # Jobs mostly wait on the backend, so threads sharing SESSION's connection pool are enough
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda job: analyze_song_cli(job["user_id"], job["project_id"], job["file_name"], job.get("render_output")), jobs))
+
 def main():
     parser = argparse.ArgumentParser(description="AutoCut CLI tester for AI Video Editor Backend.")
-    parser.add_argument("--user-id", required=True, help="The user ID associated with the music file.")
-    parser.add_argument("--project-id", required=True, help="The project ID associated with the music file.")
-    parser.add_argument("--file-name", required=True, help="The filename of the music file in Firebase Storage (e.g., 'my_song.mp3').")
+    parser.add_argument("--user-id", help="The user ID associated with the music file.")
+    parser.add_argument("--project-id", help="The project ID associated with the music file.")
+    parser.add_argument("--file-name", help="The filename of the music file in Firebase Storage (e.g., 'my_song.mp3').")
     parser.add_argument("--render-output", type=str, help="Optional local path to save the rendered AutoCut video.")
+    parser.add_argument("--batch", type=str, help="JSONL file of jobs with user_id, project_id, file_name and optional render_output; runs them concurrently.")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_JOBS, help=f"Batch jobs in flight at once (default: CPU count, {MAX_CONCURRENT_JOBS}).")
     args = parser.parse_args()
 
+    if args.batch:
+        run_batch(args.batch, args.concurrency)
+        return
+    if not (args.user_id and args.project_id and args.file_name):
+        parser.error("--user-id, --project-id and --file-name are required unless --batch is given")
     analyze_song_cli(args.user_id, args.project_id, args.file_name, args.render_output)
 
 if __name__ == "__main__":
@@ -1,13 +1,26 @@
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
+import shutil
 from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
 
-from tests.timecode import hhmmss_to_seconds # Import from utils
+from tests.timecode import hhmmss_to_seconds_batch # Import from utils
 
 # Assuming the FastAPI app is running locally at this URL
 BASE_URL = "http://127.0.0.1:8000"
+# Rendered videos can be GBs; copy them in 1 MiB reads
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# One keep-alive session for every call, so each request after the first skips the TCP handshake
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Batch jobs in flight at once; each keeps the backend busy analyzing or rendering
+MAX_CONCURRENT_JOBS = os.cpu_count() or 4
 
 def generate_highlights_cli(user_id: str, project_id: str, scene_interval: int = 12, user_prompt: Optional[str] = None, render_output: Optional[str] = None):
     print(f"Generating highlights for User: {user_id}, Project: {project_id} with scene interval: {scene_interval}s")
@@ -22,7 +35,7 @@ def generate_highlights_cli(user_id: str, project_id: str, scene_interval: int =
     }
 
     try:
-        response = requests.post(f"{BASE_URL}/highlights/generate", json=payload)
+        response = SESSION.post(f"{BASE_URL}/highlights/generate", json=payload)
         response.raise_for_status() # Raise an exception for HTTP errors
         highlights_data = response.json()
         
@@ -31,11 +44,14 @@ def generate_highlights_cli(user_id: str, project_id: str, scene_interval: int =
             print(f"Total Scenes: {highlights_data['total_scenes']}")
             print(f"Generated At: {highlights_data['generated_at']}")
             
-            segments_to_keep = []
-            for i, highlight in enumerate(highlights_data['highlights']):
+            highlights = highlights_data['highlights']
+            for i, highlight in enumerate(highlights):
                 print(f"Scene {i+1}: ID={highlight['scene_id']}, Start={highlight['start_timestamp']}, End={highlight['end_timestamp']}, Description='{highlight['description']}'")
-                segments_to_keep.append((hhmmss_to_seconds(highlight['start_timestamp']), hhmmss_to_seconds(highlight['end_timestamp'])))
             print("-------------------------------")
+            # Convert every start and end timestamp in two batch calls
+            starts = hhmmss_to_seconds_batch([highlight['start_timestamp'] for highlight in highlights])
+            ends = hhmmss_to_seconds_batch([highlight['end_timestamp'] for highlight in highlights])
+            segments_to_keep = list(zip(starts.tolist(), ends.tolist()))
 
             if render_output:
                 print(f"\nRendering highlights to local file: {render_output}")
@@ -44,7 +60,7 @@ def generate_highlights_cli(user_id: str, project_id: str, scene_interval: int =
                     "project_id": project_id,
                     "segments_to_keep": segments_to_keep
                 }
-                render_response = requests.post(f"{BASE_URL}/rendervideo", json=render_payload)
+                render_response = SESSION.post(f"{BASE_URL}/rendervideo", json=render_payload)
                 render_response.raise_for_status()
                 render_data = render_response.json()
                 
@@ -54,12 +70,13 @@ def generate_highlights_cli(user_id: str, project_id: str, scene_interval: int =
                     # Download the rendered video locally using the debug endpoint
                     download_url = f"{BASE_URL}/debug/download-file?path={rendered_video_path_in_storage}"
                     print(f"Attempting to download from: {download_url}")
-                    download_response = requests.get(download_url, stream=True)
+                    # identity encoding: the raw socket bytes are the file, so they can be copied as-is
+                    download_response = SESSION.get(download_url, stream=True, headers={"Accept-Encoding": "identity"})
                     download_response.raise_for_status()
 
                     with open(render_output, 'wb') as f:
-                        for chunk in download_response.iter_content(chunk_size=8192):
-                            f.write(chunk)
+                        download_response.raw.decode_content = True
+                        shutil.copyfileobj(download_response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
                     print(f"Downloaded rendered video to {render_output}")
                 else:
                     print("Failed to get rendered video path from backend.")
@@ -77,15 +94,30 @@ def generate_highlights_cli(user_id: str, project_id: str, scene_interval: int =
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
+def run_batch(batch_path: str, concurrency: int = MAX_CONCURRENT_JOBS):
+    """Runs every job in a JSONL file ({"user_id", "project_id", "scene_interval"?, "prompt"?, "render_output"?} per line); each job runs the single-run flow above, `concurrency` at a time."""
+    with open(batch_path) as f:
+        jobs = [json.loads(line) for line in f if line.strip()]
+    # Jobs mostly wait on the backend, so threads sharing SESSION's connection pool are enough
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda job: generate_highlights_cli(job["user_id"], job["project_id"], job.get("scene_interval", 12), job.get("prompt"), job.get("render_output")), jobs))
+
 def main():
     parser = argparse.ArgumentParser(description="HighlightsReelGen CLI tester for AI Video Editor Backend.")
-    parser.add_argument("--user-id", required=True, help="The user ID for the project.")
-    parser.add_argument("--project-id", required=True, help="The project ID for which to generate highlights.")
+    parser.add_argument("--user-id", help="The user ID for the project.")
+    parser.add_argument("--project-id", help="The project ID for which to generate highlights.")
     parser.add_argument("--scene-interval", type=int, default=12, help="Optional scene interval in seconds (default: 12).")
     parser.add_argument("--prompt", type=str, help="Optional user prompt to guide highlight generation (e.g., 'sports highlights').")
     parser.add_argument("--render-output", type=str, help="Optional local path to save the rendered highlights video.")
+    parser.add_argument("--batch", type=str, help="JSONL file of jobs with user_id, project_id and optional scene_interval, prompt, render_output; runs them concurrently.")
+    parser.add_argument("--concurrency", type=int, default=MAX_CONCURRENT_JOBS, help=f"Batch jobs in flight at once (default: CPU count, {MAX_CONCURRENT_JOBS}).")
     args = parser.parse_args()
 
+    if args.batch:
+        run_batch(args.batch, args.concurrency)
+        return
+    if not (args.user_id and args.project_id):
+        parser.error("--user-id and --project-id are required unless --batch is given")
     generate_highlights_cli(args.user_id, args.project_id, args.scene_interval, args.prompt, args.render_output)
 
 if __name__ == "__main__":
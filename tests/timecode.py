@@ -1,8 +1,10 @@
+import numpy as np
+from typing import List
+
 def seconds_to_hhmmss(seconds: float) -> str:
     """Converts a float of seconds to HH:MM:SS format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02}:{minutes:02}:{secs:02}"
 
 def hhmmss_to_seconds(ts: str) -> float:
@@ -16,3 +18,17 @@ def hhmmss_to_seconds(ts: str) -> float:
         return parts[0]
     else:
         raise ValueError("Invalid time format. Expected HH:MM:SS, MM:SS, or SS.")
+
+# Place values of the HH, MM and SS columns
+_HHMMSS_WEIGHTS = np.array([3600, 60, 1], dtype=np.int64)
+
+def hhmmss_to_seconds_batch(timestamps: List[str]) -> np.ndarray:
+    """Vectorized hhmmss_to_seconds: converts a list of HH:MM:SS, MM:SS or SS strings with one matrix product."""
+    rows = []
+    for ts in timestamps:
+        parts = ts.split(':')
+        if len(parts) > 3:
+            raise ValueError("Invalid time format. Expected HH:MM:SS, MM:SS, or SS.")
+        # Left-pad MM:SS and SS so every row lines up with the HH, MM, SS weights
+        rows.append(['0'] * (3 - len(parts)) + parts)
+    return np.array(rows, dtype=str).reshape(-1, 3).astype(np.int64) @ _HHMMSS_WEIGHTS
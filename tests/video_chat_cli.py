@@ -1,11 +1,17 @@
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
 
 # Assuming the FastAPI app is running locally at this URL
 BASE_URL = "http://127.0.0.1:8000"
 
+# One keep-alive session for every call, so each request after the first skips the TCP handshake
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
 def ask_question_cli(user_id: str, project_id: str, session_id: str = None):
     print(f"Starting VideoChat CLI for User: {user_id}, Project: {project_id}")
     print("Type your questions. Type 'exit' to quit.")
@@ -25,7 +31,7 @@ def ask_question_cli(user_id: str, project_id: str, session_id: str = None):
         }
 
         try:
-            response = requests.post(f"{BASE_URL}/videochat/ask", json=payload)
+            response = SESSION.post(f"{BASE_URL}/videochat/ask", json=payload)
             response.raise_for_status() # Raise an exception for HTTP errors
             response_data = response.json()
             